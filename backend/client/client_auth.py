@@ -1,7 +1,10 @@
 from flask import request, jsonify,Blueprint
 from utils.env_variables_loader import CLERK_PUBLISHABLE_KEY
+from client.clients import get_http_client
 from functools import wraps
-import requests
+import threading
+import time
+from cachetools import TLRUCache
 from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError
 from jwt.algorithms import RSAAlgorithm
@@ -11,6 +14,95 @@ CLERK_FRONTEND_API = CLERK_PUBLISHABLE_KEY.split("_")[1]  # e.g. 'test', 'abcd12
 CLERK_ISSUER = "https://accepted-narwhal-55.clerk.accounts.dev"
 JWKS_URL = "https://accepted-narwhal-55.clerk.accounts.dev/.well-known/jwks.json"
 
+JWKS_CACHE_TTL = 3600  # seconds a fetched JWKS is trusted
+JWKS_MIN_REFRESH_INTERVAL = 60  # seconds between forced refetches for unknown 'kid's
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+
+# --- JWKS key cache: kid -> parsed public key ---
+_jwks_keys = {}
+_jwks_fetched_at = 0.0
+_jwks_last_attempt = 0.0  # successful or not, so an outage cannot trigger a fetch per request
+_jwks_lock = threading.Lock()
+_jwks_refresh_lock = threading.Lock()  # held by the single in-flight fetch
+
+# --- Verified token cache: token -> payload, each entry expires at the token's 'exp' ---
+_verified_tokens = TLRUCache(
+    maxsize=VERIFIED_TOKEN_CACHE_SIZE,
+    ttu=lambda _token, payload, now: payload.get("exp", now),
+    timer=time.time,
+)
+_verified_tokens_lock = threading.Lock()
+
+
+def _refresh_jwks():
+    """Fetch the Clerk JWKS and swap in the parsed key cache. Caller must hold _jwks_refresh_lock."""
+    global _jwks_keys, _jwks_fetched_at, _jwks_last_attempt
+    with _jwks_lock:
+        _jwks_last_attempt = time.time()
+    try:
+        jwks_response = get_http_client().get(JWKS_URL)
+        jwks_response.raise_for_status()
+        keys = {
+            key["kid"]: RSAAlgorithm.from_jwk(key)
+            for key in jwks_response.json().get("keys", [])
+            if key.get("kid")
+        }
+    except Exception as e:
+        # Keep serving the last good key set if Clerk is unreachable
+        print(f"Error refreshing JWKS: {e}")
+        return
+    with _jwks_lock:
+        _jwks_keys = keys
+        _jwks_fetched_at = time.time()
+
+
+def _refresh_due():
+    return time.time() - _jwks_last_attempt >= JWKS_MIN_REFRESH_INTERVAL
+
+
+def _background_refresh():
+    try:
+        _refresh_jwks()
+    finally:
+        _jwks_refresh_lock.release()
+
+
+def get_clerk_public_key(kid):
+    """Return the parsed public key for 'kid', refetching the JWKS at most once per JWKS_MIN_REFRESH_INTERVAL.
+
+    A stale key set is refreshed in the background while the cached keys keep serving requests.
+    """
+    with _jwks_lock:
+        keys = _jwks_keys
+        fetched_at = _jwks_fetched_at
+
+    if not keys:
+        # Cold start: one caller fetches, concurrent callers wait for its result
+        with _jwks_refresh_lock:
+            if not _jwks_keys and _refresh_due():
+                _refresh_jwks()
+        return _jwks_keys.get(kid)
+
+    if kid not in keys:
+        # Key rotation: Clerk may have published a new key since our last fetch. Made-up kids
+        # share the same rate limit, and other requests never wait on this fetch.
+        if _refresh_due() and _jwks_refresh_lock.acquire(blocking=False):
+            try:
+                if _refresh_due():
+                    _refresh_jwks()
+            finally:
+                _jwks_refresh_lock.release()
+        return _jwks_keys.get(kid)
+
+    stale = time.time() - fetched_at >= JWKS_CACHE_TTL
+    if stale and _refresh_due() and _jwks_refresh_lock.acquire(blocking=False):
+        if _refresh_due():
+            threading.Thread(target=_background_refresh, name="jwks-refresh", daemon=True).start()
+        else:
+            _jwks_refresh_lock.release()
+    return keys[kid]
+
+
 def verify_clerk_token(token: str):
     """Verify Clerk JWT token and return user claims"""
     try:
@@ -18,6 +110,11 @@ def verify_clerk_token(token: str):
         if token.startswith("Bearer "):
             token = token[len("Bearer "):]
 
+        with _verified_tokens_lock:
+            cached_payload = _verified_tokens.get(token)
+        if cached_payload is not None:
+            return cached_payload
+
         # Decode header to get 'kid'
         unverified_header = jwt.get_unverified_header(token)
         kid = unverified_header.get("kid")
@@ -25,20 +122,12 @@ def verify_clerk_token(token: str):
             print("No 'kid' found in token header")
             return None
 
-        # Fetch JWKS from Clerk
-        jwks_response = requests.get(JWKS_URL)
-        jwks_response.raise_for_status()
-        jwks = jwks_response.json()
-
-        # Find the JWK with the correct 'kid'
-        key_data = next((key for key in jwks["keys"] if key["kid"] == kid), None)
-        if not key_data:
+        # Look up the public key from the cached JWKS
+        public_key = get_clerk_public_key(kid)
+        if not public_key:
             print("No matching key found in JWKS")
             return None
 
-        # Convert JWK to public RSA key
-        public_key = RSAAlgorithm.from_jwk(key_data)
-
         # Decode and verify token
         payload = jwt.decode(
             token,
@@ -48,6 +137,10 @@ def verify_clerk_token(token: str):
             options={"verify_aud": False}  # Set to True if you need audience check
         )
 
+        if payload.get("exp"):
+            with _verified_tokens_lock:
+                _verified_tokens[token] = payload
+
         return payload
 
     except ExpiredSignatureError:
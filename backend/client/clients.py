@@ -1,11 +1,82 @@
 from utils.env_variables_loader import SUPABASE_KEY,SUPABASE_URL,GEMINI_API_KEY,MURF_API_KEY
-from supabase import Client,create_client
-# from transformers import pipeline
-import google.generativeai as genai
-from murf import Murf
-# Initialize Supabase,Gemini,Bart and Murf client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-genai.configure(api_key=GEMINI_API_KEY)
-gemini_client = genai.GenerativeModel("gemini-2.0-flash")
-murf_client = Murf(api_key=MURF_API_KEY)
-# bart_client = pipeline("summarization", model="facebook/bart-large-cnn")
+from utils.env_variables_loader import HTTP_CONNECT_TIMEOUT,HTTP_READ_TIMEOUT,HTTP_POOL_TIMEOUT
+from utils.env_variables_loader import HTTP_MAX_CONNECTIONS,HTTP_MAX_KEEPALIVE,HTTP_KEEPALIVE_EXPIRY,HTTP2_ENABLED
+import threading
+# Supabase, Gemini, Murf and HTTP clients are built on first use, not at import: worker startup
+# makes no network calls and does not pay for importing every SDK up front.
+_clients = {}
+_clients_lock = threading.RLock()  # factories may build the clients they depend on
+
+
+def _get_client(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def http_timeout(read=HTTP_READ_TIMEOUT):
+    """Transport timeouts with a per-call read limit; connecting is always bounded by HTTP_CONNECT_TIMEOUT."""
+    import httpx
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT)
+
+
+def _create_http():
+    import httpx
+    return httpx.Client(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=http_timeout(),
+        follow_redirects=True,
+    )
+
+
+def _create_supabase():
+    from supabase import create_client, ClientOptions
+    # Not given the shared HTTP client: postgrest and storage each overwrite the base_url and
+    # headers (service key included) of the client they receive. Their own clients already pool
+    # connections over HTTP/2, so only the timeouts are set here.
+    options = ClientOptions(
+        postgrest_client_timeout=http_timeout(),
+        storage_client_timeout=int(HTTP_READ_TIMEOUT),
+    )
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+
+
+def _create_gemini():
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel("gemini-2.0-flash")
+
+
+def _create_murf():
+    from murf import Murf
+    return Murf(api_key=MURF_API_KEY, timeout=HTTP_READ_TIMEOUT, httpx_client=get_http_client())
+
+
+def get_http_client():
+    """The process-wide pooled HTTP client for plain outbound requests (signed URLs, JWKS, Murf).
+
+    Connections are kept alive per host and multiplexed over HTTP/2 where the host supports it.
+    Send credentials per request; never set them on the client itself.
+    """
+    return _get_client("http", _create_http)
+
+
+def get_supabase():
+    return _get_client("supabase", _create_supabase)
+
+
+def get_gemini_client():
+    return _get_client("gemini", _create_gemini)
+
+
+def get_murf_client():
+    return _get_client("murf", _create_murf)
@@ -0,0 +1,68 @@
+import tempfile
+import threading
+from client.clients import get_supabase
+from utils.helper import download_murf_clips,as_buffered_reader
+from utils.mp3_stream import combine_mp3_streams
+from utils.job_queue import JobStore,JobQueue
+from utils.directory_cache import directory_cache
+from utils.env_variables_loader import EXPORT_SPOOL_MAX_BYTES,EXPORT_JOB_WORKERS,JOB_DB_PATH
+
+EXPORT_BUCKET = "murf-audiofiles"
+
+# --- Export job queue, created on first use ---
+_export_queue = None
+_export_queue_lock = threading.Lock()
+
+def get_export_queue():
+    global _export_queue
+    with _export_queue_lock:
+        if _export_queue is None:
+            _export_queue = JobQueue(JobStore(JOB_DB_PATH), EXPORT_JOB_WORKERS)
+        return _export_queue
+
+def export_combined_audio(user_id, file_name, configs, job=None):
+    """Synthesize, combine and upload one audiobook. Reports per-clip progress to job when given."""
+    clips = []
+    combined = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+    on_clip_done = job.advance if job else None
+
+    try:
+        # Step 1: Generate & download all MP3 clips concurrently, keeping config order
+        if job:
+            job.set_stage("synthesizing")
+        clips = download_murf_clips(configs, on_clip_done=on_clip_done)
+
+        # Step 2: Combine all MP3s into one, frame by frame
+        if job:
+            job.set_stage("combining")
+        combine_mp3_streams(clips, combined)
+
+        # Step 3: Stream the combined file to Supabase
+        if job:
+            job.set_stage("uploading")
+        path_in_storage = f"{user_id}/{file_name}"
+        get_supabase().storage.from_(EXPORT_BUCKET).upload(path_in_storage, as_buffered_reader(combined),file_options={
+            "content-type":"audio/mpeg",
+            "upsert":"true"
+        })
+
+        directory_cache.invalidate(user_id, EXPORT_BUCKET)
+
+        return {"supabase_path": path_in_storage, "file_name": file_name}
+
+    finally:
+        for clip in clips:
+            clip.close()
+        combined.close()
+
+def submit_export_job(user_id, file_name, configs):
+    """Queue an export on the local worker pool and return its job id."""
+    return get_export_queue().submit(
+        "export-audio",
+        user_id,
+        lambda job: export_combined_audio(user_id, file_name, configs, job),
+        total=len(configs),
+    )
+
+def get_export_job(job_id):
+    return get_export_queue().store.get(job_id)
@@ -1,14 +1,32 @@
+import hashlib
 import json
-from jsonschema import validate, ValidationError
+import os
+import re
+import threading
 import time
+import unicodedata
+from jsonschema import validate, ValidationError
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
 from utils.class_definitions import StyleDetails,ApiVoice
-from client.clients import murf_client,gemini_client
+from utils.voice_catalog import VoiceCatalog
+from utils.tiered_cache import TieredCache
+from utils.env_variables_loader import STORY_CHUNK_CHARS,STORY_CHUNK_WORKERS,STORY_CHUNK_RETRIES,VOICE_CACHE_TTL,VOICE_SNAPSHOT_PATH
+from utils.env_variables_loader import CACHE_DB_PATH,RECOMMENDATION_CACHE_SIZE,RECOMMENDATION_CACHE_MAX_ENTRIES
+from utils.rate_limiter import gemini_generate
+from utils.json_stream import IncrementalObjectParser
+from utils.text_chunking import SENTENCE_BOUNDARY,split_text_into_chunks
+from client.clients import get_murf_client
+
+recommendation_cache = TieredCache(
+    "recommendations", CACHE_DB_PATH, RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_MAX_ENTRIES
+)
 
 # --- Murf Voice Parsing Logic ---
 def fetch_parsed_voices():
     """Fetch and parse Murf voices into ApiVoice objects."""
     try:
-        raw_voices = murf_client.text_to_speech.get_voices()
+        raw_voices = get_murf_client().text_to_speech.get_voices()
     except Exception as e:
         print(f"Error fetching voices: {e}")
         return []
@@ -62,61 +80,139 @@ CONFIG_SCHEMA = {
     "additionalProperties": False
 }
 
-# --- Caching for voice data as dicts for Gemini/config ---
-_voice_cache = None
-_cache_timestamp = None
+# --- Fallback voices, in ApiVoice.to_dict() shape ---
+FALLBACK_VOICES = [
+    {
+        "voice_id": "en-US-ken",
+        "display_name": "Ken (M)",
+        "gender": "Male",
+        "locale": "en-US",
+        "accent": "US & Canada",
+        "description": "Middle-Aged",
+        "display_language": "English",
+        "available_styles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Furious", "Angry", "Sobbing", "Sad"],
+        "supported_locales": {
+            "en-US": {
+                "available_styles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Furious", "Angry", "Sobbing", "Sad"],
+                "detail": "English (US & Canada)"
+            }
+        }
+    },
+    {
+        "voice_id": "en-US-natalie",
+        "display_name": "Natalie (F)",
+        "gender": "Female",
+        "locale": "en-US",
+        "accent": "US & Canada",
+        "description": "Young Adult",
+        "display_language": "English",
+        "available_styles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Empathetic", "Excited"],
+        "supported_locales": {
+            "en-US": {
+                "available_styles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Empathetic", "Excited"],
+                "detail": "English (US & Canada)"
+            }
+        }
+    }
+]
 
-def fetch_murf_voices():
-    """Fetch complete voice data with all available styles and locales as dicts for Gemini/config."""
-    global _voice_cache, _cache_timestamp
-    import time
+# --- Caching for voice data as an indexed catalog for Gemini/config ---
+# Served stale-while-revalidate: a stale catalog is returned immediately while one
+# background thread refetches it; the last good catalog is snapshotted to disk.
+VOICE_REFRESH_RETRY_INTERVAL = 60  # seconds between refresh attempts after a failure
 
-    if _voice_cache and _cache_timestamp and (time.time() - _cache_timestamp) < 3600:
-        return _voice_cache
+_voice_catalog = None
+_cache_timestamp = None
+_last_refresh_attempt = 0.0
+_snapshot_loaded = False
+_voice_state_lock = threading.Lock()
+_voice_refresh_lock = threading.Lock()  # held by the single in-flight refresh
+
+def _load_voice_snapshot():
+    """Seed the cache from the on-disk snapshot, once per process."""
+    global _voice_catalog, _cache_timestamp, _snapshot_loaded
+    with _voice_state_lock:
+        if _snapshot_loaded:
+            return
+        _snapshot_loaded = True
+        if _voice_catalog is not None:
+            return
+        try:
+            with open(VOICE_SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("voices"):
+                _voice_catalog = VoiceCatalog(snapshot["voices"])
+                _cache_timestamp = snapshot.get("fetched_at", 0)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading voice snapshot: {e}")
+
+def _save_voice_snapshot(voices_data, fetched_at):
+    try:
+        os.makedirs(os.path.dirname(VOICE_SNAPSHOT_PATH) or ".", exist_ok=True)
+        tmp_path = f"{VOICE_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": fetched_at, "voices": voices_data}, f)
+        os.replace(tmp_path, VOICE_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"Error saving voice snapshot: {e}")
 
+def _refresh_voice_catalog():
+    """Fetch voices from Murf and swap in a new catalog. Caller must hold _voice_refresh_lock."""
+    global _voice_catalog, _cache_timestamp, _last_refresh_attempt
+    _last_refresh_attempt = time.time()
     try:
         parsed_voices = fetch_parsed_voices()
         voices_data = [v.to_dict() for v in parsed_voices]
-        _voice_cache = voices_data
-        _cache_timestamp = time.time()
-        return _voice_cache
+        if not voices_data:
+            raise ValueError("Murf returned no voices")
     except Exception as e:
+        # Keep serving the last good catalog
         print(f"Error fetching voices: {e}")
-        # Return comprehensive fallback data
-        return [
-            {
-                "voiceId": "en-US-ken",
-                "displayName": "Ken (M)",
-                "gender": "Male",
-                "locale": "en-US",
-                "accent": "US & Canada",
-                "description": "Middle-Aged",
-                "displayLanguage": "English",
-                "availableStyles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Furious", "Angry", "Sobbing", "Sad"],
-                "supportedLocales": {
-                    "en-US": {
-                        "availableStyles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Furious", "Angry", "Sobbing", "Sad"],
-                        "detail": "English (US & Canada)"
-                    }
-                }
-            },
-            {
-                "voiceId": "en-US-natalie",
-                "displayName": "Natalie (F)",
-                "gender": "Female",
-                "locale": "en-US",
-                "accent": "US & Canada",
-                "description": "Young Adult",
-                "displayLanguage": "English",
-                "availableStyles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Empathetic", "Excited"],
-                "supportedLocales": {
-                    "en-US": {
-                        "availableStyles": ["Conversational", "Promo", "Newscast", "Storytelling", "Calm", "Empathetic", "Excited"],
-                        "detail": "English (US & Canada)"
-                    }
-                }
-            }
-        ]
+        return
+
+    catalog = VoiceCatalog(voices_data)
+    fetched_at = time.time()
+    with _voice_state_lock:
+        previous_version = _voice_catalog.version if _voice_catalog else None
+        _voice_catalog = catalog
+        _cache_timestamp = fetched_at
+    _save_voice_snapshot(voices_data, fetched_at)
+
+    if previous_version and previous_version != catalog.version:
+        # Cached recommendations may reference voices or styles that changed
+        recommendation_cache.invalidate(keep_tag=catalog.version)
+
+def _background_refresh():
+    try:
+        _refresh_voice_catalog()
+    finally:
+        _voice_refresh_lock.release()
+
+def get_voice_catalog():
+    """Indexed catalog of Murf voices; never blocks on Murf once a catalog or snapshot exists."""
+    _load_voice_snapshot()
+    with _voice_state_lock:
+        catalog = _voice_catalog
+        fetched_at = _cache_timestamp or 0
+
+    if catalog is None:
+        # Cold start with no snapshot: one caller fetches, concurrent callers wait for its result
+        with _voice_refresh_lock:
+            if _voice_catalog is None and time.time() - _last_refresh_attempt >= VOICE_REFRESH_RETRY_INTERVAL:
+                _refresh_voice_catalog()
+        return _voice_catalog or VoiceCatalog(FALLBACK_VOICES)
+
+    stale = time.time() - fetched_at >= VOICE_CACHE_TTL
+    retry_due = time.time() - _last_refresh_attempt >= VOICE_REFRESH_RETRY_INTERVAL
+    if stale and retry_due and _voice_refresh_lock.acquire(blocking=False):
+        threading.Thread(target=_background_refresh, name="voice-refresh", daemon=True).start()
+    return catalog
+
+def fetch_murf_voices():
+    """Fetch complete voice data with all available styles and locales as dicts for Gemini/config."""
+    return get_voice_catalog().voices
 
 # --- Gemini Analysis and Config Generation (from paste.txt) ---
 # def get_gemini_comprehensive_analysis(text):
@@ -346,9 +442,9 @@ def fetch_murf_voices():
 #     return line_configs
 
 
-def get_story_tts_configs_with_voice_assignment(story_text):
-    voices_data = fetch_murf_voices()
-    voice_info = [
+def build_voice_info(voices_data):
+    """Compact voice summaries for Gemini prompts."""
+    return [
         {
             "voiceId": v["voice_id"],
             "displayName": v["display_name"],
@@ -361,7 +457,58 @@ def get_story_tts_configs_with_voice_assignment(story_text):
         for v in voices_data
     ]
 
-    prompt = f"""
+# --- Recommendation result cache ---
+def normalize_story_text(story_text):
+    """Unicode-normalize and collapse whitespace so cosmetic edits hit the same cache entry."""
+    text = unicodedata.normalize("NFC", story_text)
+    return "\n\n".join(" ".join(p.split()) for p in re.split(r"\n\s*\n", text) if p.strip())
+
+def recommendation_cache_key(story_text, catalog_version, chunked):
+    digest = hashlib.sha256(normalize_story_text(story_text).encode("utf-8")).hexdigest()
+    return f"{digest}:{catalog_version}:{'chunked' if chunked else 'single'}"
+
+def get_story_tts_configs_with_voice_assignment(story_text, chunked=None, use_cache=True):
+    """Per-sentence Murf configs for story_text.
+
+    Long stories (over STORY_CHUNK_CHARS, or when chunked=True) are analyzed chunk by chunk.
+    Results are cached per normalized text and voice catalog version.
+    """
+    if chunked is None:
+        chunked = len(story_text) > STORY_CHUNK_CHARS
+
+    catalog_version = get_voice_catalog().version
+    key = recommendation_cache_key(story_text, catalog_version, chunked)
+    if use_cache:
+        cached = recommendation_cache.get(key)
+        if cached is not None:
+            return cached
+
+    if chunked:
+        result = get_story_tts_configs_chunked(story_text)
+    else:
+        result = get_story_tts_configs_single(story_text)
+
+    # Partial results are not cached so a later request can retry the failed chunks
+    if result and not result.get("failed_chunks"):
+        recommendation_cache.set(key, result, tag=catalog_version)
+    return result
+
+def get_story_tts_configs_single(story_text):
+    """Analyze the whole story in one Gemini prompt."""
+    voices_data = fetch_murf_voices()
+    prompt = build_story_prompt(story_text, build_voice_info(voices_data))
+
+    try:
+        response = gemini_generate(prompt)
+        cleaned = clean_gemini_response(response.text)
+        result = json.loads(cleaned)
+        return result
+    except Exception as e:
+        print(f"Error processing Gemini response: {e}")
+        return None
+
+def build_story_prompt(story_text, voice_info):
+    return f"""
 You are an expert TTS dialogue designer using Murf AI voices. Below is a story passage. Your task is to:
 
 1. Identify the **narration style** (first-person, third-person limited/omniscient, dialogue-based, or mixed).
@@ -411,16 +558,364 @@ You are an expert TTS dialogue designer using Murf AI voices. Below is a story p
 Use voice gender + description to best match the character. Keep the same voiceId per speaker, but vary the other config fields to reflect sentence emotion or tone. Return only valid JSON. Do not hallucinate characters or voices.
 """
 
+# --- Chunked story analysis ---
+def split_story_into_chunks(story_text, max_chars=STORY_CHUNK_CHARS):
+    return split_text_into_chunks(story_text, max_chars)
+
+def get_story_character_voice_map(story_text, voice_info):
+    """First pass: narration type and one voiceId per speaker, without per-sentence configs."""
+    prompt = f"""
+You are an expert TTS dialogue designer using Murf AI voices. Read the story below and:
+
+1. Identify the **narration style** (first-person, third-person limited/omniscient, dialogue-based, or mixed).
+2. Extract every **character/narrator** who speaks or narrates.
+3. Assign **one Murf voice ID per character/narrator** using gender, age, and accent. Always include "Narrator".
+
+### Available Murf Voices:
+{json.dumps(voice_info, indent=2)}
+
+### Story Text:
+\"\"\"
+{story_text}
+\"\"\"
+
+### Output Format (strict JSON):
+
+{{
+  "narration_type": "first_person | third_person_limited | third_person_omniscient | dialogue_based | mixed",
+  "character_voice_map": {{
+    "Narrator": "en-US-ken",
+    "Mary": "en-US-natalie"
+  }}
+}}
+
+Return only valid JSON. Do not hallucinate characters or voices.
+"""
+    response = gemini_generate(prompt)
+    result = json.loads(clean_gemini_response(response.text))
+    if not result.get("character_voice_map"):
+        raise ValueError("Gemini returned no character_voice_map")
+    return result
+
+def get_chunk_sentence_configs(chunk_text, character_voice_map, voice_info):
+    """Per-sentence configs for one chunk, with speaker voices pinned to character_voice_map."""
+    pinned_voice_ids = set(character_voice_map.values())
+    pinned_voice_info = [v for v in voice_info if v["voiceId"] in pinned_voice_ids] or voice_info
+
+    prompt = f"""
+You are an expert TTS dialogue designer using Murf AI voices. Below is one passage of a longer story whose speakers already have fixed voices.
+
+For each **sentence** of the passage:
+   - Identify the speaker (character/narrator). Speakers not in the map below are voiced by "Narrator".
+   - Use the speaker's voiceId from the map below, unchanged.
+   - Dynamically compute: `pitch`, `rate`, `style`, `variation`
+   - Return a **valid MurfAI config** for each sentence.
+
+### Fixed Character Voices:
+{json.dumps(character_voice_map, indent=2)}
+
+### Voice Capabilities:
+{json.dumps(pinned_voice_info, indent=2)}
+
+### Passage:
+\"\"\"
+{chunk_text}
+\"\"\"
+
+### Output Format (strict JSON):
+
+{{
+  "sentence_configs": [
+    {{
+      "text": "Sentence 1",
+      "speaker": "Mary",
+      "voiceId": "en-US-natalie",
+      "format": "MP3",
+      "channelType": "MONO",
+      "multiNativeLocale": "en-US",
+      "pitch": 5,
+      "rate": -3,
+      "sampleRate": 44100,
+      "style": "Calm",
+      "variation": 1,
+      "encodeAsBase64": false
+    }},
+    ...
+  ]
+}}
+
+Cover every sentence of the passage in order. Vary the config fields to reflect sentence emotion or tone. Return only valid JSON.
+"""
+    response = gemini_generate(prompt)
+    result = json.loads(clean_gemini_response(response.text))
+    sentence_configs = result.get("sentence_configs")
+    if not isinstance(sentence_configs, list) or not sentence_configs:
+        raise ValueError("Gemini returned no sentence_configs")
+    if not all(isinstance(config, dict) for config in sentence_configs):
+        raise ValueError("Gemini returned malformed sentence_configs")
+    # The prompt asks for the mapped voices; enforce them so chunks cannot drift apart
+    narrator_voice_id = character_voice_map.get("Narrator") or next(iter(character_voice_map.values()))
+    texts = [config.get("text") or "" for config in sentence_configs]
+    return _pin_span_configs(texts, sentence_configs, character_voice_map, narrator_voice_id)
+
+def _analyze_chunk_with_retries(index, chunk_text, character_voice_map, voice_info):
+    last_error = None
+    for attempt in range(1 + STORY_CHUNK_RETRIES):
+        try:
+            return get_chunk_sentence_configs(chunk_text, character_voice_map, voice_info)
+        except Exception as e:
+            last_error = e
+            print(f"Chunk {index + 1} attempt {attempt + 1} failed: {e}")
+    raise last_error
+
+def iter_story_tts_configs_chunked(story_text, max_chars=STORY_CHUNK_CHARS):
+    """Resolve character voices once, then analyze chunks concurrently, yielding results in story order.
+
+    Yields ("value", key, value) for narration_type and character_voice_map, then
+    ("item", "sentence_configs", config) per sentence as each chunk completes. A chunk that
+    still fails after its retries falls back to default configs in the narrator's voice and is
+    reported in a final ("value", "failed_chunks", [...]) event.
+    """
+    voice_info = build_voice_info(fetch_murf_voices())
+    chunks = split_story_into_chunks(story_text, max_chars)
+    if not chunks:
+        raise ValueError("Story contains no text")
+
+    voice_assignment = get_story_character_voice_map(story_text, voice_info)
+    character_voice_map = voice_assignment["character_voice_map"]
+    narrator_voice_id = character_voice_map.get("Narrator") or next(iter(character_voice_map.values()))
+    yield ("value", "narration_type", voice_assignment.get("narration_type"))
+    yield ("value", "character_voice_map", character_voice_map)
+
+    failed_chunks = []
+    with ThreadPoolExecutor(max_workers=max(1, STORY_CHUNK_WORKERS)) as executor:
+        futures = [
+            executor.submit(_analyze_chunk_with_retries, index, chunk, character_voice_map, voice_info)
+            for index, chunk in enumerate(chunks)
+        ]
+        try:
+            for index, (chunk, future) in enumerate(zip(chunks, futures)):
+                try:
+                    chunk_configs = future.result()
+                except Exception:
+                    failed_chunks.append(index)
+                    chunk_configs = []
+                    for sentence in SENTENCE_BOUNDARY.split(chunk):
+                        if sentence.strip():
+                            config = fallback_config(sentence.strip())
+                            config.update({"speaker": "Narrator", "voiceId": narrator_voice_id})
+                            chunk_configs.append(config)
+                for config in chunk_configs:
+                    yield ("item", "sentence_configs", config)
+        finally:
+            # Consumer stopped early (e.g. client disconnected): skip chunks not yet started
+            for future in futures:
+                future.cancel()
+
+    if failed_chunks:
+        yield ("value", "failed_chunks", failed_chunks)
+
+def get_story_tts_configs_chunked(story_text, max_chars=STORY_CHUNK_CHARS):
+    """Chunked analysis collected into the same shape as a single-prompt result."""
     try:
-        response = gemini_client.generate_content(prompt)
-        time.sleep(5)
-        cleaned = clean_gemini_response(response.text)
-        result = json.loads(cleaned)
-        return result
+        return collect_story_events(iter_story_tts_configs_chunked(story_text, max_chars))
     except Exception as e:
-        print(f"Error processing Gemini response: {e}")
+        print(f"Error in chunked story analysis: {e}")
         return None
 
+def collect_story_events(events):
+    """Assemble ("value"/"item", key, value) events into a result dict."""
+    result = {"sentence_configs": []}
+    for kind, key, value in events:
+        if kind == "item":
+            result.setdefault(key, []).append(value)
+        else:
+            result[key] = value
+    return result
+
+# --- Streaming recommendation ---
+def iter_story_tts_configs_single(story_text):
+    """Stream the single-prompt analysis, yielding each top-level value and sentence config as soon as Gemini completes it."""
+    prompt = build_story_prompt(story_text, build_voice_info(fetch_murf_voices()))
+    parser = IncrementalObjectParser(array_keys=["sentence_configs"])
+    for chunk in gemini_generate(prompt, stream=True):
+        for event in parser.feed(chunk.text):
+            yield event
+    if not parser.done:
+        raise ValueError("Gemini response ended before the JSON was complete")
+
+def stream_story_tts_configs(story_text, chunked=None, use_cache=True):
+    """Event stream for a recommendation, served from the result cache when possible.
+
+    The complete result is cached once the stream finishes without failed chunks.
+    """
+    if chunked is None:
+        chunked = len(story_text) > STORY_CHUNK_CHARS
+
+    catalog_version = get_voice_catalog().version
+    key = recommendation_cache_key(story_text, catalog_version, chunked)
+    cached = recommendation_cache.get(key) if use_cache else None
+    if cached is not None:
+        for name, value in cached.items():
+            if name != "sentence_configs":
+                yield ("value", name, value)
+        for config in cached.get("sentence_configs", []):
+            yield ("item", "sentence_configs", config)
+        return
+
+    events = iter_story_tts_configs_chunked(story_text) if chunked else iter_story_tts_configs_single(story_text)
+    collected = []
+    for event in events:
+        collected.append(event)
+        yield event
+
+    result = collect_story_events(collected)
+    if result["sentence_configs"] and not result.get("failed_chunks"):
+        recommendation_cache.set(key, result, tag=catalog_version)
+
+# --- Incremental re-recommendation for edited sentences ---
+def diff_sentences(previous_texts, current_texts):
+    """Opcodes (tag, i1, i2, j1, j2) for the spans that differ between two sentence lists."""
+    previous_keys = [" ".join(t.split()) for t in previous_texts]
+    current_keys = [" ".join(t.split()) for t in current_texts]
+    matcher = SequenceMatcher(None, previous_keys, current_keys, autojunk=False)
+    return [op for op in matcher.get_opcodes() if op[0] != "equal"]
+
+def get_span_sentence_configs(spans, character_voice_map, voice_info):
+    """Configs for the target sentences of each span, analyzed in one prompt with surrounding context.
+
+    spans: [{"before": [...], "targets": [...], "after": [...]}]. Returns one config list per span.
+    """
+    pinned_voice_ids = set(character_voice_map.values())
+    pinned_voice_info = [v for v in voice_info if v["voiceId"] in pinned_voice_ids] or voice_info
+    passages = [
+        {"span": index, "context_before": span["before"], "sentences": span["targets"], "context_after": span["after"]}
+        for index, span in enumerate(spans)
+    ]
+
+    prompt = f"""
+You are an expert TTS dialogue designer using Murf AI voices. A user edited some sentences of a longer story whose speakers already have fixed voices.
+
+For each span below, return one config per entry in "sentences" (in order, with "text" copied exactly). Use the context sentences only to understand who is speaking and the emotional tone; do not return configs for them.
+   - Identify the speaker (character/narrator). Speakers not in the map below are voiced by "Narrator".
+   - Use the speaker's voiceId from the map below, unchanged.
+   - Dynamically compute: `pitch`, `rate`, `style`, `variation`
+
+### Fixed Character Voices:
+{json.dumps(character_voice_map, indent=2)}
+
+### Voice Capabilities:
+{json.dumps(pinned_voice_info, indent=2)}
+
+### Edited Spans:
+{json.dumps(passages, indent=2)}
+
+### Output Format (strict JSON):
+
+{{
+  "spans": [
+    {{
+      "span": 0,
+      "sentence_configs": [
+        {{
+          "text": "Sentence 1",
+          "speaker": "Mary",
+          "voiceId": "en-US-natalie",
+          "format": "MP3",
+          "channelType": "MONO",
+          "multiNativeLocale": "en-US",
+          "pitch": 5,
+          "rate": -3,
+          "sampleRate": 44100,
+          "style": "Calm",
+          "variation": 1,
+          "encodeAsBase64": false
+        }}
+      ]
+    }}
+  ]
+}}
+
+Return only valid JSON.
+"""
+    response = gemini_generate(prompt)
+    result = json.loads(clean_gemini_response(response.text))
+    by_span = {item.get("span"): item.get("sentence_configs") or [] for item in result.get("spans", [])}
+    return [by_span.get(index, []) for index in range(len(spans))]
+
+def _pin_span_configs(targets, configs, character_voice_map, narrator_voice_id):
+    """Align Gemini configs to the edited sentences and force each speaker's mapped voice."""
+    pinned = []
+    for position, text in enumerate(targets):
+        config = dict(configs[position]) if position < len(configs) else fallback_config(text)
+        speaker = config.get("speaker") if config.get("speaker") in character_voice_map else "Narrator"
+        config.update({
+            "text": text,
+            "speaker": speaker,
+            "voiceId": character_voice_map.get(speaker, narrator_voice_id),
+        })
+        pinned.append(config)
+    return pinned
+
+def get_incremental_tts_configs(previous_configs, character_voice_map, sentences, context_window=2):
+    """Re-analyze only the sentences that changed since previous_configs, keeping voice assignments fixed.
+
+    Returns a patch against previous_configs: ops of {"start", "end", "sentence_configs"} meaning
+    "replace previous_configs[start:end] with sentence_configs", ordered by start. Ops whose sentences
+    could not be analyzed carry fallback configs and are listed by index in "failed_spans".
+    """
+    previous_texts = [c.get("text", "") for c in previous_configs]
+    opcodes = diff_sentences(previous_texts, sentences)
+    narrator_voice_id = character_voice_map.get("Narrator") or next(iter(character_voice_map.values()), "en-US-ken")
+
+    spans = [
+        {
+            "before": sentences[max(0, j1 - context_window):j1],
+            "targets": sentences[j1:j2],
+            "after": sentences[j2:j2 + context_window],
+        }
+        for _, _, _, j1, j2 in opcodes
+    ]
+    analyzed = [None for _ in spans]
+    to_analyze = [index for index, span in enumerate(spans) if span["targets"]]
+    if to_analyze:
+        voice_info = build_voice_info(fetch_murf_voices())
+        subset = [spans[index] for index in to_analyze]
+        for attempt in range(1 + STORY_CHUNK_RETRIES):
+            try:
+                for index, configs in zip(to_analyze, get_span_sentence_configs(subset, character_voice_map, voice_info)):
+                    analyzed[index] = configs
+                break
+            except Exception as e:
+                print(f"Incremental analysis attempt {attempt + 1} failed: {e}")
+
+    patch = []
+    failed_spans = []
+    for index, ((tag, i1, i2, j1, j2), span, configs) in enumerate(zip(opcodes, spans, analyzed)):
+        # Every retry failed, or Gemini left out some of the span's sentences
+        if span["targets"] and (configs is None or len(configs) < len(span["targets"])):
+            failed_spans.append(index)
+        patch.append({
+            "op": tag,
+            "start": i1,
+            "end": i2,
+            "sentence_configs": _pin_span_configs(span["targets"], configs or [], character_voice_map, narrator_voice_id),
+        })
+
+    return {
+        "character_voice_map": character_voice_map,
+        "patch": patch,
+        "changed_sentences": sum(len(span["targets"]) for span in spans),
+        "failed_spans": failed_spans,
+    }
+
+def apply_sentence_patch(previous_configs, patch):
+    """Apply a get_incremental_tts_configs patch to the previous sentence_configs."""
+    merged = list(previous_configs)
+    for op in sorted(patch, key=lambda op: op["start"], reverse=True):
+        merged[op["start"]:op["end"]] = op["sentence_configs"]
+    return merged
+
 def clean_gemini_response(raw_text):
     import re
 
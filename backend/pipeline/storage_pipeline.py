@@ -0,0 +1,52 @@
+import threading
+from utils.storage_ops import delete_folder_tree,move_folder_tree
+from utils.job_queue import JobStore,JobQueue
+from utils.directory_cache import directory_cache
+from utils.signed_urls import signed_url_cache
+from utils.env_variables_loader import STORAGE_JOB_WORKERS,JOB_DB_PATH
+
+# --- Folder operation job queue, created on first use ---
+_storage_queue = None
+_storage_queue_lock = threading.Lock()
+
+def get_storage_queue():
+    global _storage_queue
+    with _storage_queue_lock:
+        if _storage_queue is None:
+            _storage_queue = JobQueue(JobStore(JOB_DB_PATH), STORAGE_JOB_WORKERS)
+        return _storage_queue
+
+def _run_folder_operation(operation, job, user_id, bucket, *folders):
+    """Run a storage_ops operation, recording the file count and per-file progress on job.
+
+    Files that failed are listed in the result; submitting the same operation again finishes them.
+    """
+    job.set_stage("listing")
+    reported_total = [None]
+
+    def on_progress(amount, total):
+        if reported_total[0] is None:
+            job.set_total(total)
+            job.set_stage("processing")
+            reported_total[0] = total
+        job.advance(amount)
+
+    try:
+        return operation(bucket, *folders, on_progress=on_progress)
+    finally:
+        directory_cache.invalidate(user_id, bucket)
+        for folder in folders:
+            signed_url_cache.invalidate_prefix(bucket, folder)
+
+def submit_folder_delete(user_id, bucket, folder):
+    return get_storage_queue().submit(
+        "folder-delete", user_id, lambda job: _run_folder_operation(delete_folder_tree, job, user_id, bucket, folder)
+    )
+
+def submit_folder_move(user_id, bucket, source, target):
+    return get_storage_queue().submit(
+        "folder-move", user_id, lambda job: _run_folder_operation(move_folder_tree, job, user_id, bucket, source, target)
+    )
+
+def get_storage_job(job_id):
+    return get_storage_queue().store.get(job_id)
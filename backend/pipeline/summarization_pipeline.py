@@ -1,16 +1,145 @@
-from utils.helper import estimate_cost
-from client.clients import gemini_client
+import hashlib
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.helper import estimate_cost, decode_file
+from utils.tiered_cache import TieredCache
+from utils.rate_limiter import gemini_generate, estimate_tokens
+from utils.text_chunking import split_text_into_chunks
+from utils.extractive_summary import extractive_summarize
+from utils.env_variables_loader import SUMMARY_CHUNK_TOKENS,SUMMARY_WORKERS,SUMMARIZATION_MODE,EXTRACTIVE_SUMMARY_RATIO
+from utils.env_variables_loader import CACHE_DB_PATH,DOCUMENT_CACHE_SIZE,DOCUMENT_CACHE_MAX_ENTRIES
+
+SUMMARIZATION_MODES = ("extractive", "gemini", "hybrid")
+
+# Content hash -> extracted text, and (content hash, mode) -> summary
+document_cache = TieredCache("documents", CACHE_DB_PATH, DOCUMENT_CACHE_SIZE, DOCUMENT_CACHE_MAX_ENTRIES)
 
 # def bart_summarizer(text, max_tokens=150, min_tokens=40):
 #     summary = bart_client(text, max_length=max_tokens, min_length=min_tokens, do_sample=False)
 #     return summary[0]['summary_text']
 def gemini_summarize(prompt: str):
-    response =gemini_client.generate_content(f"Summarize this text:\n\n{prompt}")
+    response = gemini_generate(f"Summarize this text:\n\n{prompt}")
+    return response.text
+
+def summarize_chunk(chunk, index, total):
+    response = gemini_generate(
+        f"This is part {index + 1} of {total} of a longer document. "
+        f"Summarize this part, keeping the names, events and facts a summary of the whole document would need:\n\n{chunk}"
+    )
+    return response.text
+
+def combine_summaries(summaries):
+    joined = "\n\n".join(f"Part {i + 1}:\n{summary}" for i, summary in enumerate(summaries))
+    response = gemini_generate(
+        f"These are summaries of consecutive parts of one document. Combine them into a single summary of the whole document:\n\n{joined}"
+    )
     return response.text
 
-def summarize_text(original_text):
-    summary = gemini_summarize(original_text)
+def _run_stage(executor, func, items, stage, on_progress):
+    """func(item) for every item on the executor; results in input order, progress as each finishes."""
+    results = [None] * len(items)
+    futures = {executor.submit(func, item): i for i, item in enumerate(items)}
+    try:
+        for completed, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress:
+                on_progress(stage, completed, len(items))
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+def map_reduce_summarize(text, max_tokens=SUMMARY_CHUNK_TOKENS, max_workers=SUMMARY_WORKERS, on_progress=None):
+    """Summarize token-bounded chunks concurrently, then reduce the partial summaries in a final pass.
+
+    Partial summaries that together still exceed max_tokens are first combined in groups, so every
+    Gemini call stays bounded. on_progress(stage, completed, total) is called as each call finishes,
+    with stage "map", "reduce" or "final".
+    """
+    max_chars = max_tokens * 4  # estimate_tokens counts about 4 characters per token
+    chunks = split_text_into_chunks(text, max_chars)
+    if len(chunks) <= 1:
+        summary = gemini_summarize(text)
+        if on_progress:
+            on_progress("final", 1, 1)
+        return summary
+
+    # Gemini's own limiter paces these; the pool only bounds how many wait on it at once
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="summarize") as executor:
+        summaries = _run_stage(
+            executor, lambda item: summarize_chunk(item[1], item[0], len(chunks)), list(enumerate(chunks)), "map", on_progress
+        )
+        while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > max_tokens:
+            groups = split_summaries_into_groups(summaries, max_chars)
+            if len(groups) == len(summaries):
+                break  # every summary fills a call on its own; grouping cannot shrink the input
+            summaries = _run_stage(executor, combine_summaries, groups, "reduce", on_progress)
+
+    summary = combine_summaries(summaries) if len(summaries) > 1 else summaries[0]
+    if on_progress:
+        on_progress("final", 1, 1)
+    return summary
 
+def split_summaries_into_groups(summaries, max_chars):
+    groups = [[]]
+    size = 0
+    for summary in summaries:
+        if groups[-1] and size + len(summary) > max_chars:
+            groups.append([])
+            size = 0
+        groups[-1].append(summary)
+        size += len(summary)
+    return groups
+
+def generate_summary(original_text, mode=None, on_progress=None):
+    """Summarize with the given mode.
+
+    mode "extractive" ranks sentences locally with no network call, "gemini" summarizes with
+    Gemini, and "hybrid" has Gemini rewrite the extractive summary (far fewer input tokens).
+    The optional on_progress(stage, completed, total) callback streams the Gemini calls' progress
+    (see map_reduce_summarize); the local extractive step does not report any.
+    """
+    mode = mode or SUMMARIZATION_MODE
+    if mode not in SUMMARIZATION_MODES:
+        raise ValueError(f"Unknown summarization mode '{mode}'; expected one of {', '.join(SUMMARIZATION_MODES)}")
+
+    if mode == "gemini":
+        return map_reduce_summarize(original_text, on_progress=on_progress)
+    summary = extractive_summarize(original_text, ratio=EXTRACTIVE_SUMMARY_RATIO)
+    if mode == "hybrid" and summary:
+        summary = map_reduce_summarize(summary, on_progress=on_progress)
+    return summary
+
+def summary_result(original_text, summary):
     char_count_orig, cost_orig = estimate_cost(original_text)
     char_count_summary, cost_summary = estimate_cost(summary)
     return {"original_text":{"text":original_text,"char_count":char_count_orig,"cost":cost_orig},"summarized_text":{"text":summary,"char_count":char_count_summary,"cost":cost_summary}}
+
+def summarize_text(original_text, mode=None, on_progress=None):
+    """Summary plus character/cost figures for the original and the summary."""
+    return summary_result(original_text, generate_summary(original_text, mode, on_progress))
+
+def summarize_document(file_bytes, filename, mode=None, on_progress=None):
+    """decode_file + summarize_text, skipping both for content seen before.
+
+    Extracted text is cached by content hash and file type, and summaries by content hash and
+    mode, so re-uploading a manuscript under any name costs no extraction and no Gemini calls.
+    on_progress is passed to generate_summary and is not called when the summary is cached.
+    """
+    mode = mode or SUMMARIZATION_MODE
+    kind = mimetypes.guess_type(filename)[0] or "text/plain"
+    digest = hashlib.sha256(file_bytes).hexdigest()
+
+    text_key = f"text:{kind}:{digest}"
+    text = document_cache.get(text_key)
+    if text is None:
+        text = decode_file(file_bytes, filename)
+        document_cache.set(text_key, text)
+
+    summary_key = f"summary:{mode}:{EXTRACTIVE_SUMMARY_RATIO if mode != 'gemini' else ''}:{kind}:{digest}"
+    summary = document_cache.get(summary_key)
+    if summary is None:
+        summary = generate_summary(text, mode, on_progress)
+        document_cache.set(summary_key, summary)
+    return summary_result(text, summary)
@@ -0,0 +1,166 @@
+# --- Content-addressed on-disk cache for synthesized audio clips ---
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+# Murf SDK kwargs (snake_case) and the camelCase keys used by Gemini configs
+_CONFIG_ALIASES = {
+    "voiceId": "voice_id",
+    "sampleRate": "sample_rate",
+    "channelType": "channel_type",
+    "multiNativeLocale": "multi_native_locale",
+}
+
+# Fields that change the synthesized audio, with the value Murf uses when omitted
+_CONFIG_DEFAULTS = {
+    "text": "",
+    "voice_id": "",
+    "pitch": 0,
+    "rate": 0,
+    "style": "",
+    "variation": 1,
+    "sample_rate": 44100,
+    "format": "MP3",
+    "channel_type": "MONO",
+    "multi_native_locale": "",
+}
+
+
+def normalize_clip_config(config):
+    """Reduce a Murf config to the fields that affect the audio, with defaults filled in."""
+    normalized = dict(_CONFIG_DEFAULTS)
+    for key, value in config.items():
+        key = _CONFIG_ALIASES.get(key, key)
+        if key in normalized and value is not None:
+            normalized[key] = value
+
+    normalized["text"] = " ".join(str(normalized["text"]).split())
+    normalized["format"] = str(normalized["format"]).upper()
+    normalized["channel_type"] = str(normalized["channel_type"]).upper()
+    for key in ("pitch", "rate", "variation", "sample_rate"):
+        normalized[key] = int(normalized[key])
+    return normalized
+
+
+def clip_cache_key(config):
+    """Hash of the normalized config; identical audio requests share a key."""
+    payload = json.dumps(normalize_clip_config(config), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ClipCache:
+    """Directory of clips named by config hash, evicted least-recently-used once over max_bytes."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.clip")
+
+    def _load_index(self):
+        """Index clips left on disk by earlier runs, oldest first. Caller must hold _lock."""
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".clip"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(".clip")], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+
+    def get_path(self, key):
+        """Return the cached clip path for key (marking it recently used), or None on a miss."""
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            if not os.path.exists(path):
+                # Evicted by another worker process
+                if key in self._entries:
+                    self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            if key not in self._entries:
+                # Written by another worker process
+                size = os.path.getsize(path)
+                self._entries[key] = size
+                self._total_bytes += size
+            self._entries.move_to_end(key)
+            try:
+                os.utime(path)  # keeps LRU order across restarts
+            except OSError:
+                pass
+            self.hits += 1
+            return path
+
+    def new_temp_path(self, key):
+        """A fresh path in the cache directory to write a clip to before commit()."""
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{self._path(key)}.{uuid.uuid4().hex}.tmp"
+
+    def put_file(self, key, source_path):
+        """Copy a finished clip into the cache."""
+        tmp_path = self.new_temp_path(key)
+        shutil.copyfile(source_path, tmp_path)
+        self.commit(key, tmp_path)
+
+    def put_stream(self, key, stream):
+        """Copy a readable binary stream (from its current position) into the cache."""
+        tmp_path = self.new_temp_path(key)
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+        self.commit(key, tmp_path)
+
+    def put_bytes(self, key, data):
+        """Store clip bytes in the cache."""
+        tmp_path = self.new_temp_path(key)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self.commit(key, tmp_path)
+
+    def commit(self, key, tmp_path):
+        """Atomically move a finished temp file (from new_temp_path) into the cache as key."""
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            self._load_index()
+            os.replace(tmp_path, self._path(key))
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used clips until under max_bytes. Caller must hold _lock."""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
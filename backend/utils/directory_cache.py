@@ -0,0 +1,83 @@
+# --- Per-user directory listing cache, invalidated by storage mutations ---
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache
+from utils.env_variables_loader import CACHE_DB_PATH,DIRECTORY_CACHE_TTL,DIRECTORY_CACHE_SIZE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directory_generations (
+    user_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (user_id, bucket)
+)
+"""
+
+
+class DirectoryCache:
+    """Listing pages cached per (user, bucket, generation).
+
+    Every mutation bumps the user's generation for that bucket in a SQLite table shared by all
+    worker processes on the host, so no worker serves a page listed before the change. Pages
+    also expire after ttl seconds as a backstop for changes made outside this app.
+    """
+
+    def __init__(self, db_path, ttl, maxsize):
+        self.db_path = db_path
+        self._pages = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                if not self._initialized:
+                    conn.execute(_SCHEMA)
+                    self._initialized = True
+                yield conn
+        finally:
+            conn.close()
+
+    def generation(self, user_id, bucket):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT generation FROM directory_generations WHERE user_id = ? AND bucket = ?", (user_id, bucket)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading directory cache generation: {e}")
+            return None
+        return row[0] if row else 0
+
+    def get(self, user_id, bucket, generation, key):
+        if generation is None:
+            return None
+        with self._lock:
+            return self._pages.get((user_id, bucket, generation, key))
+
+    def set(self, user_id, bucket, generation, key, entries):
+        if generation is None:
+            return
+        with self._lock:
+            self._pages[(user_id, bucket, generation, key)] = entries
+
+    def invalidate(self, user_id, bucket):
+        """Make every cached listing of user's files in bucket stale, in all processes."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO directory_generations (user_id, bucket, generation) VALUES (?, ?, 1) "
+                    "ON CONFLICT (user_id, bucket) DO UPDATE SET generation = generation + 1",
+                    (user_id, bucket),
+                )
+        except sqlite3.Error as e:
+            print(f"Error invalidating directory cache: {e}")
+
+
+directory_cache = DirectoryCache(CACHE_DB_PATH, DIRECTORY_CACHE_TTL, DIRECTORY_CACHE_SIZE)
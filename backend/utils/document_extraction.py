@@ -0,0 +1,195 @@
+# --- Document text extraction: PDF pages on a process pool, streamed in order ---
+import io
+import mimetypes
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.env_variables_loader import EXTRACT_MAX_BYTES,EXTRACT_MAX_PAGES,EXTRACT_MAX_CHARS,EXTRACT_WORKERS,EXTRACT_PAGES_PER_TASK
+
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool():
+    """Process pool shared by every extraction in this worker, created on first large PDF."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Never fork a threaded Flask worker; forkserver children start from a clean process
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _discard_extraction_pool(pool):
+    """Drop a broken pool so the next extraction starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pdf_pages(path, start, end):
+    """Text of pages [start, end) of the PDF at path. Runs in a pool process."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(file_bytes, max_pages=EXTRACT_MAX_PAGES, pages_per_task=EXTRACT_PAGES_PER_TASK):
+    """Yield page texts in order, extracting page ranges in parallel for large documents.
+
+    At most two ranges per worker are in flight, so extracted text waiting to be consumed stays bounded.
+    """
+    from PyPDF2 import PdfReader
+    try:
+        reader = PdfReader(io.BytesIO(file_bytes))
+        page_count = len(reader.pages)
+    except Exception as e:
+        raise ValueError(f"PDF parsing failed: {e}")
+    if page_count > max_pages:
+        raise ValueError(f"PDF has {page_count} pages; the limit is {max_pages}")
+
+    if page_count <= pages_per_task or EXTRACT_WORKERS <= 1:
+        for page in reader.pages:
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                raise ValueError(f"PDF parsing failed: {e}")
+            yield text
+        return
+    del reader
+
+    # Every range re-opens the document, so keep ranges few: about four per worker
+    pages_per_task = max(pages_per_task, -(-page_count // (EXTRACT_WORKERS * 4)))
+
+    # Workers read the document from a temp file rather than receiving a pickled copy per range
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(file_bytes)
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    lookahead = max(1, EXTRACT_WORKERS) * 2
+    next_yield = 0  # first range not yet handed to the caller
+    retried = False
+    try:
+        while True:
+            pool = get_extraction_pool()
+            extracted = _iter_page_ranges(pool, path, ranges[next_yield:], lookahead)
+            try:
+                for pages in extracted:
+                    next_yield += 1
+                    yield from pages
+                return
+            except BrokenProcessPool as e:
+                # A killed or crashed worker breaks the whole pool; replace it and resume once
+                _discard_extraction_pool(pool)
+                if retried:
+                    raise ValueError(f"PDF parsing failed: {e}")
+                retried = True
+            finally:
+                extracted.close()  # cancels ranges still queued on the pool
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _iter_page_ranges(pool, path, ranges, lookahead):
+    """Yield each range's page texts in order, keeping at most 'lookahead' ranges in flight."""
+    pending = []
+    try:
+        for start, end in ranges[:lookahead]:
+            pending.append(pool.submit(_extract_pdf_pages, path, start, end))
+        next_range = len(pending)
+        while pending:
+            future = pending.pop(0)
+            try:
+                pages = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                raise ValueError(f"PDF parsing failed: {e}")
+            if next_range < len(ranges):
+                pending.append(pool.submit(_extract_pdf_pages, path, *ranges[next_range]))
+                next_range += 1
+            yield pages
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_docx_paragraphs(file_bytes):
+    from docx import Document
+    try:
+        doc = Document(io.BytesIO(file_bytes))
+    except Exception as e:
+        raise ValueError(f"DOCX parsing failed: {e}")
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+
+
+def detect_encoding(file_bytes):
+    """Guess the encoding of text that is not valid UTF-8, from its head, middle and tail."""
+    if file_bytes.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    sample = file_bytes
+    if len(file_bytes) > 3 * ENCODING_SAMPLE_BYTES:
+        middle = (len(file_bytes) - ENCODING_SAMPLE_BYTES) // 2
+        sample = (file_bytes[:ENCODING_SAMPLE_BYTES]
+                  + file_bytes[middle:middle + ENCODING_SAMPLE_BYTES]
+                  + file_bytes[-ENCODING_SAMPLE_BYTES:])
+    from charset_normalizer import from_bytes
+    best = from_bytes(sample).best()
+    return best.encoding if best else "latin-1"
+
+
+def decode_text(file_bytes):
+    """Decode strictly as UTF-8 when the whole file is valid UTF-8, else as the detected encoding."""
+    try:
+        return file_bytes.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        pass
+    try:
+        return file_bytes.decode(detect_encoding(file_bytes))
+    except (UnicodeDecodeError, LookupError):
+        return file_bytes.decode("latin-1")  # maps every byte, so nothing is dropped
+
+
+def iter_text(file_bytes):
+    yield decode_text(file_bytes)
+
+
+def iter_document_text(file_bytes, filename, max_bytes=EXTRACT_MAX_BYTES, max_chars=EXTRACT_MAX_CHARS):
+    """Yield a document's text in reading order (PDF pages, DOCX paragraphs, or the whole text file).
+
+    Raises ValueError when the file or the extracted text exceeds the configured limits.
+    """
+    if len(file_bytes) > max_bytes:
+        raise ValueError(f"File is {len(file_bytes)} bytes; the limit is {max_bytes}")
+
+    mime_type, _ = mimetypes.guess_type(filename)
+    if mime_type == "application/pdf":
+        parts = iter_pdf_pages(file_bytes)
+    elif mime_type == DOCX_MIME_TYPE:
+        parts = iter_docx_paragraphs(file_bytes)
+    else:
+        parts = iter_text(file_bytes)
+
+    total_chars = 0
+    try:
+        for part in parts:
+            total_chars += len(part)
+            if total_chars > max_chars:
+                raise ValueError(f"Extracted text exceeds the {max_chars} character limit")
+            yield part
+    finally:
+        parts.close()  # stops PDF ranges still queued on the pool
@@ -1,6 +1,7 @@
 # --- Environment variables---
 from dotenv import load_dotenv
 import os
+import tempfile
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -8,4 +9,79 @@ CLERK_PEM_PUBLIC_KEY = os.getenv("CLERK_PEM_PUBLIC_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MURF_API_KEY = os.getenv("MURF_API_KEY")
 MURF_VOICES_ENDPOINT = os.getenv("MURF_VOICES_ENDPOINT")
-CLERK_PUBLISHABLE_KEY=os.getenv("CLERK_PUBLISHABLE_KEY")
\ No newline at end of file
+CLERK_PUBLISHABLE_KEY=os.getenv("CLERK_PUBLISHABLE_KEY")
+# --- Export tuning ---
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT_MAX_WORKERS", "8"))
+EXPORT_CLIP_TIMEOUT = int(os.getenv("EXPORT_CLIP_TIMEOUT", "60"))  # seconds per clip request
+CLIP_CACHE_DIR = os.getenv("CLIP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sonus", "clips"))
+CLIP_CACHE_MAX_BYTES = int(os.getenv("CLIP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CLIP_SPOOL_MAX_BYTES = int(os.getenv("CLIP_SPOOL_MAX_BYTES", str(1024 * 1024)))  # per-clip buffer kept in memory
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv("EXPORT_SPOOL_MAX_BYTES", str(32 * 1024 * 1024)))  # combined file kept in memory
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))  # exports running at once per process
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(tempfile.gettempdir(), "sonus", "jobs.sqlite3"))
+
+# --- Recommendation tuning ---
+STORY_CHUNK_CHARS = int(os.getenv("STORY_CHUNK_CHARS", "4000"))  # stories longer than this are analyzed in chunks
+STORY_CHUNK_WORKERS = int(os.getenv("STORY_CHUNK_WORKERS", "4"))
+STORY_CHUNK_RETRIES = int(os.getenv("STORY_CHUNK_RETRIES", "2"))
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "15"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))  # retries after a 429
+VOICE_CACHE_TTL = int(os.getenv("VOICE_CACHE_TTL", "3600"))  # seconds before the voice catalog is revalidated
+VOICE_SNAPSHOT_PATH = os.getenv("VOICE_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "sonus", "voices.json"))
+VOICE_PAGE_MAX = int(os.getenv("VOICE_PAGE_MAX", "200"))  # largest page_size accepted by /api/tts/voices
+
+# --- Result caches ---
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(tempfile.gettempdir(), "sonus", "cache.sqlite3"))
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "256"))  # entries kept in memory
+RECOMMENDATION_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", "5000"))  # entries kept on disk
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "32"))  # extracted texts/summaries kept in memory
+DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "1000"))  # kept on disk
+
+# --- Startup ---
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))  # warn when importing the app takes longer
+
+# --- Document extraction ---
+EXTRACT_MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(50 * 1024 * 1024)))  # largest upload we will parse
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "2000"))
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", str(5 * 1024 * 1024)))  # extracted text per document
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))  # processes in the PDF pool
+EXTRACT_PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", "20"))  # smaller PDFs are parsed inline
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))  # storage uploads running alongside extraction
+
+# --- Summarization ---
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))  # longer documents are summarized map-reduce
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))  # chunk summaries in flight at once
+SUMMARIZATION_MODE = os.getenv("SUMMARIZATION_MODE", "extractive")  # extractive (local), gemini, or hybrid
+EXTRACTIVE_SUMMARY_RATIO = float(os.getenv("EXTRACTIVE_SUMMARY_RATIO", "0.2"))  # share of sentences kept
+
+# --- Storage ---
+SIGNED_URL_EXPIRES_IN = int(os.getenv("SIGNED_URL_EXPIRES_IN", "3600"))  # seconds a signed URL stays valid
+SIGNED_URL_REFRESH_MARGIN = int(os.getenv("SIGNED_URL_REFRESH_MARGIN", "300"))  # re-sign this long before expiry
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "10000"))
+STORAGE_LIST_PAGE_SIZE = int(os.getenv("STORAGE_LIST_PAGE_SIZE", "1000"))  # objects per list() page
+STORAGE_REMOVE_BATCH_SIZE = int(os.getenv("STORAGE_REMOVE_BATCH_SIZE", "1000"))  # paths per remove() call
+STORAGE_OP_WORKERS = int(os.getenv("STORAGE_OP_WORKERS", "8"))  # concurrent storage requests per folder operation
+STORAGE_JOB_WORKERS = int(os.getenv("STORAGE_JOB_WORKERS", "2"))  # background folder operations per process
+STORAGE_DOWNLOAD_TIMEOUT = int(os.getenv("STORAGE_DOWNLOAD_TIMEOUT", "60"))  # seconds per storage download request
+STORAGE_SPOOL_MAX_BYTES = int(os.getenv("STORAGE_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))  # per-file buffer kept in memory
+ZIP_PREFETCH_FILES = int(os.getenv("ZIP_PREFETCH_FILES", "4"))  # files downloaded ahead of the zip writer
+FILE_DOWNLOAD_MODE = os.getenv("FILE_DOWNLOAD_MODE", "stream")  # stream through this server, or redirect to a signed URL
+DIRECTORY_CACHE_TTL = int(os.getenv("DIRECTORY_CACHE_TTL", "300"))  # seconds a listing page may be reused
+DIRECTORY_CACHE_SIZE = int(os.getenv("DIRECTORY_CACHE_SIZE", "2000"))  # listing pages kept in memory
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "100"))  # default items per list-directory page
+LIST_PAGE_MAX = int(os.getenv("LIST_PAGE_MAX", "1000"))
+
+# --- Preview cache ---
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sonus", "previews"))
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PREVIEW_CACHE_MAX_AGE = int(os.getenv("PREVIEW_CACHE_MAX_AGE", "86400"))  # seconds browsers may reuse a preview
+
+# --- HTTP transport ---
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # seconds to open a connection
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))  # seconds to wait for each read or write
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))  # seconds to wait for a free pooled connection
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # open connections across all hosts
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "40"))  # idle connections kept for reuse
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds an idle connection is kept
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"  # negotiated per host via ALPN
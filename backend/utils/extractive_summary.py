@@ -0,0 +1,99 @@
+# --- Local extractive summarization: TextRank over sentence TF-IDF vectors ---
+import math
+import re
+from collections import Counter
+import numpy as np
+from utils.text_chunking import SENTENCE_BOUNDARY
+
+BLOCK_SENTENCES = 1000  # sentences ranked together; bounds the similarity matrix at 1000 x 1000
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other
+our ours ourselves out over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves said says
+""".split())
+
+
+def split_sentences(text):
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        for sentence in SENTENCE_BOUNDARY.split(paragraph.strip()):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def _tokenize(sentence):
+    return [word for word in _WORD.findall(sentence.lower()) if word not in STOPWORDS]
+
+
+def _textrank(term_counts, idf):
+    """PageRank scores for one block of sentences, using cosine similarity of their TF-IDF vectors."""
+    vocabulary = {}
+    for counts in term_counts:
+        for word in counts:
+            vocabulary.setdefault(word, len(vocabulary))
+
+    n = len(term_counts)
+    if n == 1 or not vocabulary:
+        return np.ones(n)
+    matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+    for row, counts in enumerate(term_counts):
+        for word, count in counts.items():
+            matrix[row, vocabulary[word]] = (1 + math.log(count)) * idf[word]
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+
+    # Row-normalize into a transition matrix; isolated sentences link to every sentence equally
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums == 0, 1, row_sums), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def extractive_summarize(text, ratio=0.2, max_sentences=None):
+    """Return the highest-ranked sentences (about 'ratio' of them) joined in their original order.
+
+    Long documents are ranked in consecutive blocks that each contribute their share, so the
+    summary covers the whole text and the cost stays linear in its length.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+
+    term_counts = [Counter(_tokenize(sentence)) for sentence in sentences]
+    document_frequency = Counter(word for counts in term_counts for word in counts)
+    total = len(sentences)
+    idf = {word: math.log((1 + total) / (1 + df)) + 1 for word, df in document_frequency.items()}
+
+    target = max(1, round(total * ratio))
+    if max_sentences:
+        target = min(target, max_sentences)
+
+    selected = []
+    for start in range(0, total, BLOCK_SENTENCES):
+        block = term_counts[start:start + BLOCK_SENTENCES]
+        scores = _textrank(block, idf)
+        keep = max(1, round(target * len(block) / total))
+        # Highest score first; ties go to the earlier sentence
+        ranked = sorted(range(len(block)), key=lambda i: (-scores[i], i))[:keep]
+        selected.extend(start + i for i in ranked)
+
+    return " ".join(sentences[i] for i in sorted(selected))
@@ -1,54 +1,119 @@
-from client.clients import murf_client
-import requests
-import mimetypes
+from client.clients import get_murf_client,get_http_client,http_timeout
+from utils.env_variables_loader import EXPORT_MAX_WORKERS,EXPORT_CLIP_TIMEOUT,CLIP_CACHE_DIR,CLIP_CACHE_MAX_BYTES,CLIP_SPOOL_MAX_BYTES
+from utils.clip_cache import ClipCache, clip_cache_key
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from utils.document_extraction import iter_document_text
+import shutil
+import tempfile
 import io
-from PyPDF2 import PdfReader
-from docx import Document
+
+# Shared by every export in this process; clips persist across restarts
+clip_cache = ClipCache(CLIP_CACHE_DIR, CLIP_CACHE_MAX_BYTES)
+
 # === Helper: Download Murf Audio Clip ===
-def download_murf_clip(config, output_filename):
-    response = murf_client.text_to_speech.generate(**config)
-    audio_url = response.audio_file
-    if not audio_url:
-        raise Exception("No audio URL returned from Murf API.")
-    
-    res = requests.get(audio_url)
-    if res.status_code == 200:
-        with open(output_filename, "wb") as f:
-            f.write(res.content)
-        print(f"Downloaded: {output_filename}")
-    else:
-        raise Exception(f"Failed to download audio. Status: {res.status_code}")
-
-# === Helper: Combine MP3s using Pure Python ===
-def combine_mp3_files_binary(mp3_files, output_path):
-    with open(output_path, "wb") as outfile:
-        for file in mp3_files:
-            with open(file, "rb") as infile:
-                outfile.write(infile.read())
-    print(f"Combined MP3 saved to: {output_path}")
+def download_murf_clip(config, timeout=EXPORT_CLIP_TIMEOUT):
+    """Return (buffer, from_cache) for config's clip; the caller closes the buffer."""
+    key = clip_cache_key(config)
+    buffer = tempfile.SpooledTemporaryFile(max_size=CLIP_SPOOL_MAX_BYTES)
+    try:
+        cached_path = clip_cache.get_path(key)
+        if cached_path:
+            try:
+                with open(cached_path, "rb") as cached:
+                    shutil.copyfileobj(cached, buffer)
+                buffer.seek(0)
+                return buffer, True
+            except FileNotFoundError:
+                pass  # evicted between lookup and read; synthesize it again
+
+        response = get_murf_client().text_to_speech.generate(
+            **config,
+            request_options={"timeout_in_seconds": timeout}
+        )
+        audio_url = response.audio_file
+        if not audio_url:
+            raise Exception("No audio URL returned from Murf API.")
+
+        # Pooled keep-alive connections: a burst of clips shares a few TLS sessions to Murf's CDN
+        with get_http_client().stream("GET", audio_url, timeout=http_timeout(timeout)) as res:
+            if res.status_code != 200:
+                raise Exception(f"Failed to download audio. Status: {res.status_code}")
+            for chunk in res.iter_bytes(chunk_size=64 * 1024):
+                buffer.write(chunk)
+
+        buffer.seek(0)
+        clip_cache.put_stream(key, buffer)
+        buffer.seek(0)
+        return buffer, False
+    except Exception:
+        buffer.close()
+        raise
+
+# === Helper: Download Many Murf Clips Concurrently ===
+def download_murf_clips(configs, max_workers=EXPORT_MAX_WORKERS, timeout=EXPORT_CLIP_TIMEOUT, on_clip_done=None):
+    """Return clip buffers in the same order as configs, fetched on a bounded worker pool.
+
+    on_clip_done() is called from the worker thread each time a clip finishes successfully.
+
+    On the first failure, clips that have not started are cancelled, clips already
+    in flight are allowed to finish (each is bounded by 'timeout'), every buffer
+    is closed and the error is raised.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(download_murf_clip, cfg, timeout) for cfg in configs]
+        if on_clip_done:
+            for future in futures:
+                future.add_done_callback(
+                    lambda f: on_clip_done() if not f.cancelled() and not f.exception() else None
+                )
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+
+    failed = next((f for f in futures if f in done and f.exception()), None)
+    if failed:
+        for future in futures:
+            if future.done() and not future.cancelled() and not future.exception():
+                future.result()[0].close()
+        index = futures.index(failed)
+        raise Exception(f"Clip {index + 1} of {len(futures)} failed: {failed.exception()}")
+
+    results = [f.result() for f in futures]
+    cache_hits = sum(1 for _, from_cache in results if from_cache)
+    print(f"Clips served from cache: {cache_hits}/{len(futures)}")
+    return [buffer for buffer, _ in results]
+
+# === Helper: Expose any seekable binary stream as a BufferedReader ===
+class _RawStreamAdapter(io.RawIOBase):
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._stream.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._stream.seek(offset, whence)
+
+    def tell(self):
+        return self._stream.tell()
+
+
+def as_buffered_reader(stream):
+    """Wrap a spooled/in-memory buffer so storage uploads stream it instead of treating it as a path."""
+    stream.seek(0)
+    return io.BufferedReader(_RawStreamAdapter(stream))
 
 def decode_file(file_bytes, filename):
-    mime_type, _ = mimetypes.guess_type(filename)
-
-    if mime_type == "application/pdf":
-        try:
-            reader = PdfReader(io.BytesIO(file_bytes))
-            return "\n".join(page.extract_text() or "" for page in reader.pages)
-        except Exception as e:
-            raise ValueError(f"PDF parsing failed: {e}")
-
-    elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        try:
-            doc = Document(io.BytesIO(file_bytes))
-            return "\n".join(p.text for p in doc.paragraphs)
-        except Exception as e:
-            raise ValueError(f"DOCX parsing failed: {e}")
-
-    else:
-        try:
-            return file_bytes.decode("utf-8")
-        except Exception:
-            return file_bytes.decode("latin-1")
+    """Extract a document's full text; see utils.document_extraction for the limits applied."""
+    return "\n".join(iter_document_text(file_bytes, filename))
     
 def estimate_cost(text, rate_per_100_chars=0.05):
     character_count = len(text)
@@ -0,0 +1,191 @@
+# --- Background job queue with SQLite-persisted state ---
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+FINISHED_JOB_RETENTION = 7 * 24 * 3600  # seconds finished jobs stay queryable
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+_COLUMNS = (
+    "id", "kind", "user_id", "status", "stage", "total", "completed", "result",
+    "error", "worker", "created_at", "started_at", "updated_at", "finished_at",
+)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Job rows in a SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+        self._fail_orphaned_jobs()
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fail_orphaned_jobs(self):
+        """Fail unfinished jobs whose worker process on this host has exited, and drop old finished jobs."""
+        now = time.time()
+        hostname = socket.gethostname()
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, worker FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+            for row in rows:
+                host, _, pid = (row["worker"] or "").rpartition(":")
+                if host == hostname and pid.isdigit() and not _pid_alive(int(pid)):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                        (JOB_FAILED, "Interrupted by a server restart", now, now, row["id"]),
+                    )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (JOB_COMPLETED, JOB_FAILED, now - FINISHED_JOB_RETENTION),
+            )
+
+    def create(self, kind, user_id, total=0):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, status, stage, total, worker, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, user_id, JOB_QUEUED, JOB_QUEUED, total, self.worker, now, now),
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        fields = {k: v for k, v in fields.items() if k in _COLUMNS and k != "id"}
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def increment(self, job_id, amount=1):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET completed = completed + ?, updated_at = ? WHERE id = ?",
+                (amount, time.time(), job_id),
+            )
+
+    def get(self, job_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+
+class JobQueue:
+    """Runs jobs on a bounded local thread pool and records their progress in a JobStore."""
+
+    def __init__(self, store, max_workers):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+
+    def submit(self, kind, user_id, func, total=0):
+        """Queue func(job) and return the job id.
+
+        func reports progress through the JobHandle it receives; its JSON-serializable
+        return value becomes the job result.
+        """
+        job_id = self.store.create(kind, user_id, total)
+        self._executor.submit(self._run, JobHandle(self.store, job_id), func)
+        return job_id
+
+    def _run(self, job, func):
+        self.store.update(job.id, status=JOB_RUNNING, stage=JOB_RUNNING, started_at=time.time())
+        try:
+            result = func(job)
+            now = time.time()
+            self.store.update(job.id, status=JOB_COMPLETED, stage=JOB_COMPLETED, result=json.dumps(result), finished_at=now)
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            self.store.update(job.id, status=JOB_FAILED, error=str(e), finished_at=time.time())
+
+
+class JobHandle:
+    """What a running job sees: its id plus progress reporting."""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.id = job_id
+
+    def set_stage(self, stage):
+        self.store.update(self.id, stage=stage)
+
+    def set_total(self, total):
+        self.store.update(self.id, total=total)
+
+    def advance(self, amount=1):
+        self.store.increment(self.id, amount)
+
+
+def job_status(job):
+    """Public view of a job row, with an ETA extrapolated from progress so far."""
+    eta_seconds = None
+    if job["status"] == JOB_RUNNING and job["started_at"] and job["completed"] and job["total"]:
+        elapsed = time.time() - job["started_at"]
+        remaining = job["total"] - job["completed"]
+        eta_seconds = round(elapsed / job["completed"] * remaining, 1)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "completed": job["completed"],
+        "total": job["total"],
+        "eta_seconds": eta_seconds,
+        "result": json.loads(job["result"]) if job["result"] else None,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
@@ -0,0 +1,103 @@
+# --- Incremental parsing of a streamed top-level JSON object ---
+import json
+import re
+
+_WHITESPACE = re.compile(r"\s*")
+_decoder = json.JSONDecoder(strict=False)
+
+
+class IncrementalObjectParser:
+    """Parse a JSON object as it arrives, emitting each top-level value as soon as it is complete.
+
+    Keys listed in array_keys are emitted element by element instead of as one list.
+    feed() returns a list of events: ("value", key, value) or ("item", key, value).
+    Leading prose or a ```json fence before the object is ignored.
+    """
+
+    def __init__(self, array_keys=()):
+        self.array_keys = set(array_keys)
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"  # start -> key -> colon -> value | array -> key ... -> done
+        self._key = None
+
+    def _skip(self, chars=""):
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) and self._buffer[self._pos] in chars:
+                self._pos += 1
+            else:
+                return
+
+    def _decode(self):
+        """Decode one complete JSON value at _pos, or return (None, False) if more input is needed."""
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return None, False
+        if end == len(self._buffer) and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return None, False  # the number may continue in the next chunk
+        self._pos = end
+        return value, True
+
+    def feed(self, text):
+        self._buffer += text
+        events = []
+        while not self.done:
+            if self._state == "start":
+                start = self._buffer.find("{", self._pos)
+                if start < 0:
+                    break
+                self._pos = start + 1
+                self._state = "key"
+
+            elif self._state == "key":
+                self._skip(",")
+                if self._pos >= len(self._buffer):
+                    break
+                if self._buffer[self._pos] == "}":
+                    self._pos += 1
+                    self.done = True
+                    break
+                key, ok = self._decode()
+                if not ok:
+                    break
+                self._key = key
+                self._state = "colon"
+
+            elif self._state == "colon":
+                self._skip(":")
+                if self._pos >= len(self._buffer):
+                    break
+                if self._key in self.array_keys and self._buffer[self._pos] == "[":
+                    self._pos += 1
+                    self._state = "array"
+                else:
+                    self._state = "value"
+
+            elif self._state == "value":
+                value, ok = self._decode()
+                if not ok:
+                    break
+                events.append(("value", self._key, value))
+                self._state = "key"
+
+            elif self._state == "array":
+                self._skip(",")
+                if self._pos >= len(self._buffer):
+                    break
+                if self._buffer[self._pos] == "]":
+                    self._pos += 1
+                    self._state = "key"
+                    continue
+                item, ok = self._decode()
+                if not ok:
+                    break
+                events.append(("item", self._key, item))
+
+        # Drop consumed input so the buffer only holds the unfinished value
+        if self._pos > 64 * 1024:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return events
@@ -0,0 +1,225 @@
+# --- Frame-aware MP3 concatenation ---
+import struct
+from array import array
+
+_READ_SIZE = 64 * 1024
+
+# Bitrates in kbps, indexed by [version is MPEG1][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# Sample rates indexed by [version bits][sample rate index]; version bits 1 is reserved
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],  # MPEG 2.5
+    2: [22050, 24000, 16000],  # MPEG 2
+    3: [44100, 48000, 32000],  # MPEG 1
+}
+
+_XING_FLAGS = 0x1 | 0x2 | 0x4  # frames, bytes, TOC
+_XING_SIZE = 4 + 4 + 4 + 4 + 100  # tag, flags, frames, bytes, TOC
+
+
+class FrameHeader:
+    """Decoded 4-byte MPEG audio frame header."""
+
+    def __init__(self, raw):
+        b1, b2, b3 = raw[1], raw[2], raw[3]
+        self.version_bits = (b1 >> 3) & 0x3
+        self.layer = 4 - ((b1 >> 1) & 0x3)  # 1, 2 or 3
+        self.bitrate_index = b2 >> 4
+        self.sample_rate_index = (b2 >> 2) & 0x3
+        self.padding = (b2 >> 1) & 0x1
+        self.channel_mode = b3 >> 6
+        self.raw = bytes(raw[:4])
+
+        self.mpeg1 = self.version_bits == 3
+        self.bitrate = _BITRATES[self.mpeg1][self.layer][self.bitrate_index] * 1000
+        self.sample_rate = _SAMPLE_RATES[self.version_bits][self.sample_rate_index]
+
+    @property
+    def samples_per_frame(self):
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and not self.mpeg1:
+            return 576
+        return 1152
+
+    @property
+    def frame_length(self):
+        if self.layer == 1:
+            return (12 * self.bitrate // self.sample_rate + self.padding) * 4
+        return self.samples_per_frame // 8 * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self):
+        mono = self.channel_mode == 3
+        if self.mpeg1:
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+
+def parse_frame_header(data, offset=0):
+    """Return a FrameHeader if data[offset:offset + 4] is a valid, supported frame header, else None."""
+    if len(data) - offset < 4:
+        return None
+    b0, b1, b2 = data[offset], data[offset + 1], data[offset + 2]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    if (b1 >> 3) & 0x3 == 1 or (b1 >> 1) & 0x3 == 0:
+        return None  # reserved version or layer
+    if b2 >> 4 in (0, 15) or (b2 >> 2) & 0x3 == 3:
+        return None  # free-format/bad bitrate or reserved sample rate
+    return FrameHeader(data[offset:offset + 4])
+
+
+def _is_info_frame(header, frame):
+    """True for Xing/Info/VBRI frames, which carry per-file metadata rather than audio."""
+    xing_offset = 4 + header.side_info_length
+    return (
+        frame[xing_offset:xing_offset + 4] in (b"Xing", b"Info")
+        or frame[36:40] == b"VBRI"
+    )
+
+
+def iter_mp3_frames(stream):
+    """Yield (header, frame_bytes) for each audio frame in stream, reading at most _READ_SIZE at a time.
+
+    ID3v2/ID3v1 tags, Xing/Info/VBRI frames and junk between frames are skipped.
+    """
+    buffer = bytearray()
+    eof = False
+    pos = 0
+    first_frame = True
+
+    def fill(needed):
+        nonlocal buffer, pos, eof
+        while not eof and len(buffer) - pos < needed:
+            if pos:
+                del buffer[:pos]
+                pos = 0
+            chunk = stream.read(_READ_SIZE)
+            if not chunk:
+                eof = True
+            else:
+                buffer += chunk
+        return len(buffer) - pos >= needed
+
+    while fill(4):
+        if buffer[pos:pos + 3] == b"ID3":
+            if not fill(10):
+                break
+            size = 0
+            for b in buffer[pos + 6:pos + 10]:
+                size = (size << 7) | (b & 0x7F)
+            footer = 10 if buffer[pos + 5] & 0x10 else 0
+            skip = 10 + size + footer
+            while skip:
+                fill(1)
+                if len(buffer) - pos == 0:
+                    return
+                step = min(skip, len(buffer) - pos)
+                pos += step
+                skip -= step
+            continue
+
+        if buffer[pos:pos + 3] == b"TAG" and fill(128):
+            pos += 128  # ID3v1 trailer
+            continue
+
+        header = parse_frame_header(buffer, pos)
+        if header is None:
+            pos += 1  # resync
+            continue
+
+        length = header.frame_length
+        if not fill(length):
+            break  # truncated final frame
+        frame = bytes(buffer[pos:pos + length])
+        pos += length
+
+        if first_frame:
+            first_frame = False
+            if header.layer == 3 and _is_info_frame(header, frame):
+                continue
+        yield header, frame
+
+
+def _build_info_frame(template, frame_count, total_bytes, frame_offsets, vbr):
+    """Build a Xing ('Xing' for VBR, 'Info' for CBR) frame matching the template header."""
+    xing_offset = 4 + template.side_info_length
+
+    # Smallest bitrate whose frame can hold the Xing payload
+    header = None
+    for bitrate_index in range(1, 15):
+        b2 = (bitrate_index << 4) | (template.sample_rate_index << 2)
+        raw = bytes([0xFF, template.raw[1] | 0x01, b2, template.raw[3]])  # no CRC, no padding
+        candidate = FrameHeader(raw)
+        if candidate.frame_length >= xing_offset + _XING_SIZE:
+            header = candidate
+            break
+    if header is None:
+        return b""
+
+    toc = bytearray(100)
+    if frame_count:
+        file_bytes = max(1, total_bytes)
+        for i in range(100):
+            frame_index = min(frame_count - 1, i * frame_count // 100)
+            toc[i] = min(255, frame_offsets[frame_index] * 256 // file_bytes)
+
+    frame = bytearray(header.frame_length)
+    frame[:4] = header.raw
+    payload = (b"Xing" if vbr else b"Info") + struct.pack(">III", _XING_FLAGS, frame_count, total_bytes) + bytes(toc)
+    frame[xing_offset:xing_offset + len(payload)] = payload
+    return bytes(frame)
+
+
+def combine_mp3_streams(sources, output):
+    """Concatenate MP3 clips frame by frame into the seekable 'output' stream.
+
+    Per-clip tags and Xing headers are dropped and one Xing/Info header describing the
+    joined audio is written in front. Returns the number of audio frames written.
+    """
+    template = None
+    reserved = 0
+    start = output.tell()
+    frame_count = 0
+    audio_bytes = 0
+    bitrates = set()
+    frame_offsets = array("L")
+
+    for index, source in enumerate(sources):
+        clip_frames = 0
+        for header, frame in iter_mp3_frames(source):
+            if template is None:
+                template = header
+                if template.layer == 3:
+                    # Reserve room for the header frame; it is filled in once totals are known
+                    reserved = len(_build_info_frame(template, 0, 0, frame_offsets, False))
+                    output.write(b"\x00" * reserved)
+            frame_offsets.append(reserved + audio_bytes)
+            output.write(frame)
+            audio_bytes += len(frame)
+            frame_count += 1
+            clip_frames += 1
+            bitrates.add(header.bitrate)
+        if clip_frames == 0:
+            raise ValueError(f"Clip {index + 1} contains no MP3 audio frames")
+
+    if template is not None and reserved:
+        end = output.tell()
+        total_bytes = reserved + audio_bytes
+        info_frame = _build_info_frame(template, frame_count, total_bytes, frame_offsets, len(bitrates) > 1)
+        output.seek(start)
+        output.write(info_frame)
+        output.seek(end)
+    return frame_count
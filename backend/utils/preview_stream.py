@@ -0,0 +1,141 @@
+# --- Preview audio: Murf stream teed into a local cache, one synthesis per config ---
+import os
+import threading
+from client.clients import get_murf_client
+from utils.clip_cache import ClipCache, clip_cache_key, normalize_clip_config
+from utils.env_variables_loader import PREVIEW_CACHE_DIR,PREVIEW_CACHE_MAX_BYTES
+
+READ_CHUNK_SIZE = 64 * 1024
+FORMAT_MIMETYPES = {
+    "MP3": "audio/mpeg",
+    "WAV": "audio/wav",
+    "FLAC": "audio/flac",
+    "OGG": "audio/ogg",
+    "ALAW": "audio/basic",
+    "ULAW": "audio/basic",
+}
+
+# Kept apart from export clips: stream output is not guaranteed byte-identical to generate()
+preview_cache = ClipCache(PREVIEW_CACHE_DIR, PREVIEW_CACHE_MAX_BYTES)
+
+
+def preview_mimetype(config):
+    return FORMAT_MIMETYPES.get(normalize_clip_config(config)["format"], "audio/mpeg")
+
+
+def sniff_mimetype(path):
+    """Mimetype of a cached preview from its first bytes (the cache does not record the format)."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == b"RIFF":
+        return "audio/wav"
+    if head == b"fLaC":
+        return "audio/flac"
+    if head == b"OggS":
+        return "audio/ogg"
+    return "audio/mpeg"
+
+
+class _Synthesis:
+    """One Murf stream being written to a temp file that any number of readers follow."""
+
+    def __init__(self, key, config):
+        self.key = key
+        self.config = config
+        self.tmp_path = preview_cache.new_temp_path(key)
+        self.size = 0
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def produce(self):
+        try:
+            with open(self.tmp_path, "wb") as f:
+                for chunk in get_murf_client().text_to_speech.stream(**self.config):
+                    f.write(chunk)
+                    f.flush()
+                    with self.condition:
+                        self.size += len(chunk)
+                        self.condition.notify_all()
+            # Readers keep their open handle across the rename
+            preview_cache.commit(self.key, self.tmp_path)
+        except Exception as e:
+            print(f"Preview synthesis failed: {e}")
+            self.error = e
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+        finally:
+            with _in_flight_lock:
+                _in_flight.pop(self.key, None)
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def follow(self, source):
+        """Yield bytes from the open temp file as the producer writes them."""
+        position = 0
+        while True:
+            with self.condition:
+                while self.size <= position and not self.done:
+                    self.condition.wait()
+                available = self.size
+                done = self.done
+            while position < available:
+                chunk = source.read(min(READ_CHUNK_SIZE, available - position))
+                if not chunk:
+                    break
+                position += len(chunk)
+                yield chunk
+            if done and position >= available:
+                if self.error is not None:
+                    raise RuntimeError(f"Preview synthesis failed: {self.error}")
+                return
+
+
+_in_flight = {}  # key -> _Synthesis
+_in_flight_lock = threading.Lock()
+
+
+def _join_synthesis(key, config):
+    """The running synthesis for key, starting one (and opening its file) if none is running.
+
+    Returns (synthesis, open temp file), or None if it finished in the meantime.
+    """
+    with _in_flight_lock:
+        synthesis = _in_flight.get(key)
+        if synthesis is None:
+            synthesis = _Synthesis(key, config)
+            open(synthesis.tmp_path, "wb").close()  # exists before any reader opens it
+            _in_flight[key] = synthesis
+            threading.Thread(target=synthesis.produce, name=f"preview-{key[:8]}", daemon=True).start()
+        try:
+            # A finishing producer may already have committed or removed it; the caller rechecks the cache
+            return synthesis, open(synthesis.tmp_path, "rb")
+        except FileNotFoundError:
+            return None
+
+
+def open_preview(config):
+    """Return (key, cached path or None, chunk iterator or None) for a preview config.
+
+    A cached clip is returned as a path to serve with Range support. Otherwise the caller gets a
+    stream that follows the one synthesis shared by every concurrent request for this config; it
+    keeps running and fills the cache even if the client disconnects.
+    """
+    key = clip_cache_key(config)
+    while True:
+        path = preview_cache.get_path(key)
+        if path:
+            return key, path, None
+        joined = _join_synthesis(key, config)
+        if joined:
+            break
+
+    synthesis, source = joined
+
+    def stream():
+        with source:
+            yield from synthesis.follow(source)
+    return key, None, stream()
@@ -0,0 +1,92 @@
+# --- Process-wide Gemini rate limiting ---
+import random
+import threading
+import time
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+from client.clients import get_gemini_client
+from utils.env_variables_loader import GEMINI_REQUESTS_PER_MINUTE,GEMINI_TOKENS_PER_MINUTE,GEMINI_MAX_RETRIES
+
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 60
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English prose)."""
+    return max(1, len(text) // 4)
+
+
+class RateLimiter:
+    """Token buckets for requests/min and tokens/min; callers block only when a budget is spent.
+
+    After a 429, backoff() pauses every caller until the penalty expires.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._request_budget = min(self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60)
+        self._token_budget = min(self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens=1):
+        """Block until one request and 'tokens' tokens fit in the budget, then spend them."""
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    missing_requests = 1 - self._request_budget
+                    missing_tokens = tokens - self._token_budget
+                    wait = max(
+                        missing_requests * 60 / self.requests_per_minute,
+                        missing_tokens * 60 / self.tokens_per_minute,
+                    )
+                    if wait <= 0:
+                        self._request_budget -= 1
+                        self._token_budget -= tokens
+                        return
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the token budget once the real usage of a call is known."""
+        with self._lock:
+            self._token_budget -= actual_tokens - estimated_tokens
+
+    def backoff(self, delay):
+        """Hold every caller for 'delay' seconds (used after the API reports 429)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+
+gemini_limiter = RateLimiter(GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE)
+
+
+def gemini_generate(prompt, **kwargs):
+    """Gemini generate_content under the shared rate limit, retrying 429s with exponential backoff."""
+    estimated = estimate_tokens(prompt)
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        gemini_limiter.acquire(estimated)
+        try:
+            response = get_gemini_client().generate_content(prompt, **kwargs)
+        except (ResourceExhausted, TooManyRequests) as e:
+            if attempt == GEMINI_MAX_RETRIES:
+                raise
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"Gemini rate limited, retrying in {delay:.1f}s: {e}")
+            gemini_limiter.backoff(delay)
+            continue
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and not kwargs.get("stream"):
+            gemini_limiter.record_usage(estimated, getattr(usage, "total_token_count", estimated) or estimated)
+        return response
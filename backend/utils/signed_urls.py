@@ -0,0 +1,62 @@
+# --- Batched, cached signed URLs for storage objects ---
+import threading
+from cachetools import TTLCache
+from client.clients import get_supabase
+from utils.env_variables_loader import SIGNED_URL_EXPIRES_IN,SIGNED_URL_REFRESH_MARGIN,SIGNED_URL_CACHE_SIZE
+
+SIGN_BATCH_SIZE = 1000  # paths per create_signed_urls request
+
+
+class SignedUrlCache:
+    """(bucket, path) -> signed URL, reused until refresh_margin seconds before the URL expires.
+
+    Misses are signed together in one create_signed_urls call per batch instead of one request per file.
+    """
+
+    def __init__(self, expires_in, refresh_margin, maxsize):
+        self.expires_in = expires_in
+        self._urls = TTLCache(maxsize=maxsize, ttl=max(1, expires_in - refresh_margin))
+        self._lock = threading.Lock()
+
+    def get_many(self, bucket, paths):
+        """Return {path: url} for every path that could be signed."""
+        urls = {}
+        missing = []
+        with self._lock:
+            for path in paths:
+                url = self._urls.get((bucket, path))
+                if url:
+                    urls[path] = url
+                else:
+                    missing.append(path)
+
+        for start in range(0, len(missing), SIGN_BATCH_SIZE):
+            batch = missing[start:start + SIGN_BATCH_SIZE]
+            signed = get_supabase().storage.from_(bucket).create_signed_urls(batch, self.expires_in)
+            with self._lock:
+                # Results come back in request order
+                for path, item in zip(batch, signed):
+                    if item.get("error") or not item.get("signedURL"):
+                        print(f"Could not sign {path}: {item.get('error')}")
+                        continue
+                    self._urls[(bucket, path)] = item["signedURL"]
+                    urls[path] = item["signedURL"]
+        return urls
+
+    def get(self, bucket, path):
+        return self.get_many(bucket, [path]).get(path)
+
+    def invalidate(self, bucket, paths):
+        with self._lock:
+            for path in paths:
+                self._urls.pop((bucket, path), None)
+
+    def invalidate_prefix(self, bucket, folder):
+        """Forget every URL under folder, after it was deleted or moved."""
+        prefix = folder.rstrip("/") + "/"
+        with self._lock:
+            for key in [key for key in self._urls if key[0] == bucket and key[1].startswith(prefix)]:
+                self._urls.pop(key, None)
+
+
+signed_url_cache = SignedUrlCache(SIGNED_URL_EXPIRES_IN, SIGNED_URL_REFRESH_MARGIN, SIGNED_URL_CACHE_SIZE)
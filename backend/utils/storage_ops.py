@@ -0,0 +1,180 @@
+# --- Folder-level storage operations: paginated tree walk, parallel moves, batched removes ---
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from client.clients import get_supabase,get_http_client,http_timeout
+from utils.signed_urls import signed_url_cache
+from utils.env_variables_loader import STORAGE_LIST_PAGE_SIZE,STORAGE_REMOVE_BATCH_SIZE,STORAGE_OP_WORKERS
+from utils.env_variables_loader import STORAGE_DOWNLOAD_TIMEOUT,STORAGE_SPOOL_MAX_BYTES
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def list_folder_entries(bucket, folder, page_size=STORAGE_LIST_PAGE_SIZE):
+    """Every entry directly under folder (files and subfolders), following pagination."""
+    storage = get_supabase().storage.from_(bucket)
+    entries = []
+    while True:
+        page = storage.list(folder, {
+            "limit": page_size,
+            "offset": len(entries),
+            "sortBy": {"column": "name", "order": "asc"},
+        })
+        entries.extend(page)
+        if len(page) < page_size:
+            return entries
+
+
+def iter_folder_files(bucket, folder, page_size=STORAGE_LIST_PAGE_SIZE):
+    """Yield the path of every object under folder, descending into subfolders and following pagination."""
+    storage = get_supabase().storage.from_(bucket)
+    pending = [folder.rstrip("/")]
+    while pending:
+        current = pending.pop()
+        offset = 0
+        while True:
+            entries = storage.list(current, {
+                "limit": page_size,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            })
+            for entry in entries:
+                path = f"{current}/{entry['name']}"
+                if entry.get("metadata") is None:
+                    pending.append(path)  # a subfolder
+                else:
+                    yield path
+            if len(entries) < page_size:
+                break
+            offset += page_size
+
+
+def delete_folder_tree(bucket, folder, on_progress=None, max_workers=STORAGE_OP_WORKERS):
+    """Remove every object under folder in batched remove calls.
+
+    The tree is listed completely before anything is removed, so pagination offsets stay valid.
+    Failed batches are reported, not raised; running the delete again removes whatever is left.
+    """
+    paths = list(iter_folder_files(bucket, folder))
+    storage = get_supabase().storage.from_(bucket)
+    batches = [paths[i:i + STORAGE_REMOVE_BATCH_SIZE] for i in range(0, len(paths), STORAGE_REMOVE_BATCH_SIZE)]
+    deleted, failed = [], []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(storage.remove, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                future.result()
+                deleted.extend(batch)
+            except Exception as e:
+                print(f"Failed to remove {len(batch)} files under {folder}: {e}")
+                failed.extend({"path": path, "error": str(e)} for path in batch)
+            if on_progress:
+                on_progress(len(batch), len(paths))
+
+    return {"deleted_files": deleted, "failed": failed}
+
+
+def move_folder_tree(bucket, source, target, on_progress=None, max_workers=STORAGE_OP_WORKERS):
+    """Move every object under source to the same relative path under target, several at a time.
+
+    Each object is moved with one server-side move, so a file is always either at its old or its new
+    path, never both or neither. After a partial failure, running the same move again picks up the
+    files still under source.
+    """
+    source = source.rstrip("/")
+    target = target.rstrip("/")
+    if target == source or target.startswith(source + "/"):
+        raise ValueError("Cannot move a folder into itself")
+
+    paths = list(iter_folder_files(bucket, source))
+    storage = get_supabase().storage.from_(bucket)
+    moved, failed = [], []
+
+    def move(path):
+        destination = target + path[len(source):]
+        storage.move(path, destination)
+        return {"from": path, "to": destination}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(move, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                moved.append(future.result())
+            except Exception as e:
+                print(f"Failed to move {futures[future]}: {e}")
+                failed.append({"path": futures[future], "error": str(e)})
+            if on_progress:
+                on_progress(1, len(paths))
+
+    return {"files_moved": moved, "failed": failed}
+
+
+def open_storage_stream(bucket, path, headers=None, timeout=STORAGE_DOWNLOAD_TIMEOUT):
+    """Start a streamed GET of one object through its signed URL and return the open httpx response.
+
+    headers (e.g. Range, If-None-Match) are forwarded, so storage answers with 206 or 304 itself
+    and only the requested bytes are transferred. The caller closes the response.
+    """
+    url = signed_url_cache.get(bucket, path)
+    if not url:
+        raise FileNotFoundError(f"Could not sign {path}")
+    client = get_http_client()
+    # Identity encoding keeps Content-Length and Content-Range true to the bytes passed through
+    headers = {"Accept-Encoding": "identity", **(headers or {})}
+    request = client.build_request("GET", url, headers=headers, timeout=http_timeout(timeout))
+    return client.send(request, stream=True)
+
+
+def download_storage_file(bucket, path, timeout=STORAGE_DOWNLOAD_TIMEOUT):
+    """Stream one object into a SpooledTemporaryFile (in memory up to STORAGE_SPOOL_MAX_BYTES, then on disk).
+
+    The caller closes the returned file.
+    """
+    url = signed_url_cache.get(bucket, path)
+    if not url:
+        raise FileNotFoundError(f"Could not sign {path}")
+    buffer = tempfile.SpooledTemporaryFile(max_size=STORAGE_SPOOL_MAX_BYTES)
+    try:
+        with get_http_client().stream("GET", url, timeout=http_timeout(timeout)) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes(STREAM_CHUNK_SIZE):
+                buffer.write(chunk)
+        buffer.seek(0)
+        return buffer
+    except Exception:
+        buffer.close()
+        raise
+
+
+def _close_result(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def prefetch_storage_files(bucket, paths, lookahead):
+    """Yield (path, file) in order while up to 'lookahead' following files download in the background.
+
+    At most lookahead + 1 files are buffered at once, whatever the number of paths.
+    """
+    paths = iter(paths)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, lookahead), thread_name_prefix="prefetch") as executor:
+        def schedule():
+            path = next(paths, None)
+            if path is not None:
+                pending.append((path, executor.submit(download_storage_file, bucket, path)))
+
+        for _ in range(max(1, lookahead)):
+            schedule()
+        try:
+            while pending:
+                path, future = pending.popleft()
+                schedule()
+                yield path, future.result()
+        finally:
+            # Consumer stopped early: drop queued downloads and close any that still finish
+            for _, future in pending:
+                future.cancel()
+                future.add_done_callback(_close_result)
@@ -0,0 +1,39 @@
+# --- Splitting long text at natural boundaries ---
+import re
+
+# Sentence ends: ., ! or ? (optionally followed by a closing quote/bracket) and whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"'\u201d\u2019)\]]))\s+")
+
+
+def split_text_into_chunks(text, max_chars):
+    """Split text into chunks of at most max_chars, breaking at paragraph, then sentence boundaries."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            sentence = sentence.strip()
+            # A single over-long sentence is split on whitespace as a last resort
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if sentence:
+                pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
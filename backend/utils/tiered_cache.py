@@ -0,0 +1,142 @@
+# --- Two-tier JSON cache: in-memory LRU in front of a SQLite table ---
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from cachetools import LRUCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    tag TEXT,
+    value TEXT NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class TieredCache:
+    """JSON-serializable values keyed by string, kept in a memory LRU and persisted to SQLite.
+
+    Each entry may carry a tag (e.g. the data version it was computed from) so a whole
+    generation of entries can be dropped at once.
+    """
+
+    def __init__(self, namespace, db_path, memory_size, max_entries):
+        self.namespace = namespace
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = LRUCache(maxsize=memory_size)  # key -> (tag, value)
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._writes_since_prune = 0
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                if not self._initialized:
+                    conn.execute(_SCHEMA)
+                    self._initialized = True
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the cached value or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self.hits += 1
+                return json.loads(entry[1])
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT tag, value FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (time.time(), self.namespace, key),
+                    )
+        except sqlite3.Error as e:
+            print(f"Error reading {self.namespace} cache: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self._memory[key] = (row[0], row[1])
+            self.hits += 1
+        return json.loads(row[1])
+
+    def set(self, key, value, tag=None):
+        serialized = json.dumps(value)
+        with self._lock:
+            self._memory[key] = (tag, serialized)
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= 100
+            if prune:
+                self._writes_since_prune = 0
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, tag, value, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, tag, serialized, time.time()),
+                )
+                if prune:
+                    self._prune(conn)
+        except sqlite3.Error as e:
+            print(f"Error writing {self.namespace} cache: {e}")
+
+    def _prune(self, conn):
+        """Keep only the max_entries most recently used rows on disk."""
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key NOT IN ("
+            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at DESC LIMIT ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        )
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            print(f"Error deleting from {self.namespace} cache: {e}")
+
+    def invalidate(self, keep_tag=None):
+        """Drop every entry, or every entry whose tag differs from keep_tag."""
+        with self._lock:
+            for key, (tag, _) in list(self._memory.items()):
+                if keep_tag is None or tag != keep_tag:
+                    del self._memory[key]
+        try:
+            with self._connect() as conn:
+                if keep_tag is None:
+                    conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+                else:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND (tag IS NULL OR tag != ?)",
+                        (self.namespace, keep_tag),
+                    )
+        except sqlite3.Error as e:
+            print(f"Error invalidating {self.namespace} cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
@@ -0,0 +1,77 @@
+# --- Indexed voice catalog ---
+import hashlib
+import json
+
+
+def _norm(value):
+    return str(value or "").strip().lower()
+
+
+class VoiceCatalog:
+    """Voice dicts (ApiVoice.to_dict() shape) indexed by voice_id, gender, locale, accent and style.
+
+    Built once per voice refresh and never mutated afterwards, so it is safe to share between threads.
+    """
+
+    def __init__(self, voices):
+        self.voices = list(voices)
+        self.by_id = {}
+        self._by_gender = {}
+        self._by_locale = {}
+        self._by_accent = {}
+        self._by_style = {}
+
+        for position, voice in enumerate(self.voices):
+            self.by_id[voice.get("voice_id")] = voice
+            self._add(self._by_gender, voice.get("gender"), position)
+            self._add(self._by_accent, voice.get("accent"), position)
+
+            supported_locales = voice.get("supported_locales") or {}
+            for locale in {voice.get("locale"), *supported_locales.keys()}:
+                self._add(self._by_locale, locale, position)
+
+            styles = set(voice.get("available_styles") or [])
+            for details in supported_locales.values():
+                styles.update(details.get("available_styles") or [])
+            for style in styles:
+                self._add(self._by_style, style, position)
+
+        payload = json.dumps(self.voices, sort_keys=True, default=str)
+        self.version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _add(index, value, position):
+        key = _norm(value)
+        if key:
+            index.setdefault(key, set()).add(position)
+
+    def __len__(self):
+        return len(self.voices)
+
+    def get(self, voice_id):
+        return self.by_id.get(voice_id)
+
+    def query(self, gender=None, locale=None, accent=None, style=None, page=None, page_size=None):
+        """Return (matching voices, total matches). Filters are case-insensitive; page is 1-based."""
+        positions = None
+        for index, value in (
+            (self._by_gender, gender),
+            (self._by_locale, locale),
+            (self._by_accent, accent),
+            (self._by_style, style),
+        ):
+            if not value:
+                continue
+            matches = index.get(_norm(value), set())
+            positions = matches if positions is None else positions & matches
+
+        if positions is None:
+            matched = self.voices
+        else:
+            matched = [self.voices[p] for p in sorted(positions)]
+
+        total = len(matched)
+        if page_size:
+            start = (max(1, page or 1) - 1) * page_size
+            matched = matched[start:start + page_size]
+        return matched, total
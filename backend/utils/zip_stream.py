@@ -0,0 +1,66 @@
+# --- Zip archives written as a stream of chunks ---
+import os
+import time
+import zipfile
+
+# Already-compressed formats are stored as-is; deflating them costs CPU and saves nothing
+STORED_EXTENSIONS = frozenset({
+    ".mp3", ".wav", ".ogg", ".oga", ".opus", ".m4a", ".aac", ".flac",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp4", ".zip", ".gz", ".docx", ".pdf",
+})
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """Write-only, unseekable file that ZipFile writes into; drain() hands back what was written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compress_type_for(name):
+    extension = os.path.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def iter_zip_stream(files):
+    """Yield a zip archive chunk by chunk from (arcname, readable binary file) pairs.
+
+    Each file is copied into the archive in COPY_CHUNK_SIZE pieces and closed afterwards, so only
+    one chunk of output is held at a time. Sizes and CRCs go in data descriptors after each entry,
+    which is what lets the archive be written without seeking.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as archive:
+        for arcname, source in files:
+            try:
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                info.compress_type = compress_type_for(arcname)
+                info.external_attr = 0o644 << 16
+                with archive.open(info, "w", force_zip64=True) as entry:
+                    while True:
+                        chunk = source.read(COPY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        entry.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+            finally:
+                source.close()
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
@@ -1,36 +1,78 @@
-from flask import request, jsonify,send_file,Blueprint
-import zipfile
-from io import BytesIO
+from flask import request, jsonify,Blueprint,Response,redirect
 import os
-from client.clients import supabase
+import unicodedata
+from urllib.parse import quote
+from werkzeug.http import dump_options_header
 from client.client_auth import auth_required
+from utils.storage_ops import iter_folder_files,prefetch_storage_files,open_storage_stream,STREAM_CHUNK_SIZE
+from utils.signed_urls import signed_url_cache
+from utils.zip_stream import iter_zip_stream
+from utils.env_variables_loader import ZIP_PREFETCH_FILES,FILE_DOWNLOAD_MODE
 
 download_bp = Blueprint("download", __name__)
 
-@download_bp.route("/api/filesystem/file/download", methods=["POST"])
+# Request headers forwarded to storage, and response headers passed back to the client
+FORWARDED_REQUEST_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+FORWARDED_RESPONSE_HEADERS = ("Content-Type", "Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified", "Cache-Control")
+
+
+def _attachment_header(filename):
+    """Content-Disposition for a download, encoded as send_file(download_name=...) does."""
+    try:
+        filename.encode("ascii")
+        names = {"filename": filename}
+    except UnicodeEncodeError:
+        # ASCII fallback for old clients, plus the RFC 5987 UTF-8 name
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+-.^_`|~')}"}
+    return dump_options_header("attachment", names)
+
+@download_bp.route("/api/filesystem/file/download", methods=["GET", "POST"])
 @auth_required
 def download_file():
+    """Stream a file from storage, honouring Range and If-None-Match (206/304 responses).
+
+    With ?redirect=true, or FILE_DOWNLOAD_MODE=redirect, responds with a redirect to a signed URL
+    so the bytes never pass through this server.
+    """
     user_id = request.user['id']
-    data = request.get_json()
     storage_bucket=request.args.get("storage_bucket")
-    file_path = data.get("file")  # e.g. "myfolder/myfile.txt"
+    if request.method == "POST":
+        file_path = (request.get_json(silent=True) or {}).get("file")  # e.g. "myfolder/myfile.txt"
+    else:
+        file_path = request.args.get("file")
 
     if not file_path:
         return jsonify({"error": "Missing file path"}), 400
 
     full_path = f"{user_id}/{file_path}"
+    filename = os.path.basename(file_path)
 
     try:
-        response = supabase.storage.from_(storage_bucket).download(full_path)
-        file_content = response
-        filename = os.path.basename(file_path)
-
-        return send_file(
-            BytesIO(file_content),
-            mimetype='application/octet-stream',
-            download_name=filename,
-            as_attachment=True
-        )
+        if request.args.get("redirect", "true" if FILE_DOWNLOAD_MODE == "redirect" else "false") == "true":
+            url = signed_url_cache.get(storage_bucket, full_path)
+            if not url:
+                return jsonify({"error": "File not found"}), 404
+            return redirect(url, code=302)
+
+        headers = {name: request.headers[name] for name in FORWARDED_REQUEST_HEADERS if name in request.headers}
+        upstream = open_storage_stream(storage_bucket, full_path, headers)
+        if upstream.status_code not in (200, 206, 304, 416):
+            upstream.close()
+            status = 404 if upstream.status_code in (400, 404) else 502
+            return jsonify({"error": f"Storage returned {upstream.status_code}"}), status
+
+        def generate():
+            try:
+                yield from upstream.iter_bytes(STREAM_CHUNK_SIZE)
+            finally:
+                upstream.close()
+
+        response_headers = {name: upstream.headers[name] for name in FORWARDED_RESPONSE_HEADERS if name in upstream.headers}
+        response_headers["Content-Disposition"] = _attachment_header(filename)
+        response = Response(generate(), status=upstream.status_code, headers=response_headers)
+        response.call_on_close(upstream.close)
+        return response
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -49,31 +91,29 @@ def download_folder():
     folder_path = f"{user_id}/{folder_path}".rstrip("/")
 
     try:
-        # List all files in the folder
-        files = supabase.storage.from_(storage_bucket).list(path=folder_path)
-
-        file_paths = [
-            f"{folder_path}/{file['name']}" for file in files if file.get("metadata") is not None
-        ]
+        # Every file under the folder, subfolders included
+        file_paths = list(iter_folder_files(storage_bucket, folder_path))
 
         if not file_paths:
             return jsonify({"message": "No files found in folder"}), 200
 
-        # Create a zip in memory
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w') as zipf:
-            for file_path in file_paths:
-                content = supabase.storage.from_("murf-documents").download(file_path)
-                arcname = os.path.relpath(file_path, start=f"{user_id}/")
-                zipf.writestr(arcname, content)
-
-        zip_buffer.seek(0)
-        return send_file(
-            zip_buffer,
+        def generate():
+            files = prefetch_storage_files(storage_bucket, file_paths, ZIP_PREFETCH_FILES)
+            entries = ((os.path.relpath(path, start=f"{user_id}/"), file) for path, file in files)
+            try:
+                yield from iter_zip_stream(entries)
+            except Exception as e:
+                # Headers are already sent; stopping here leaves the client with a truncated archive
+                print(f"Folder download of {folder_path} failed: {e}")
+                raise
+            finally:
+                files.close()
+
+        return Response(
+            generate(),
             mimetype='application/zip',
-            download_name=f"{os.path.basename(folder_path)}.zip",
-            as_attachment=True
+            headers={"Content-Disposition": _attachment_header(f"{os.path.basename(folder_path)}.zip")}
         )
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -1,12 +1,16 @@
 from flask import request, jsonify,Blueprint
-from client.clients import supabase
+from client.clients import get_supabase
 from werkzeug.utils import secure_filename
-from utils.helper import decode_file
-from pipeline.summarization_pipeline import summarize_text
+from pipeline.summarization_pipeline import summarize_document,SUMMARIZATION_MODES
 from client.client_auth import auth_required
+from utils.env_variables_loader import UPLOAD_WORKERS
+from utils.signed_urls import signed_url_cache
+from utils.directory_cache import directory_cache
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 
 file_bp = Blueprint("file", __name__)
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
 
 @file_bp.route("/api/filesystem/file", methods=["DELETE"])
 @auth_required
@@ -20,7 +24,9 @@ def delete_file():
         return jsonify({"error": "Missing file path"}), 400
 
     try:
-        supabase.storage.from_(storage_bucket).remove([path])
+        get_supabase().storage.from_(storage_bucket).remove([path])
+        directory_cache.invalidate(user_id, storage_bucket)
+        signed_url_cache.invalidate(storage_bucket, [path])
         return jsonify({"message": "File deleted", "path": path}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -41,16 +47,35 @@ def update_file():
 
     try:
         # Copy old file to new location
-        supabase.storage.from_(storage_bucket).copy(old_path, new_path)
+        get_supabase().storage.from_(storage_bucket).copy(old_path, new_path)
 
         # Delete old file
-        supabase.storage.from_(storage_bucket).remove([old_path])
+        get_supabase().storage.from_(storage_bucket).remove([old_path])
+        directory_cache.invalidate(user_id, storage_bucket)
+        signed_url_cache.invalidate(storage_bucket, [old_path, new_path])
 
         return jsonify({"message": "File updated", "from": old_path, "to": new_path}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@file_bp.route("/api/filesystem/file/signed-url", methods=["GET"])
+@auth_required
+def get_signed_urls():
+    """Sign one or more files on demand (?path=a.mp3&path=b.mp3), for listings fetched with sign=lazy."""
+    user_id = request.user['id']
+    storage_bucket=request.args.get("storage_bucket")
+    paths = request.args.getlist("path")
+    if not paths:
+        return jsonify({"error": "Missing file path"}), 400
+
+    try:
+        urls = signed_url_cache.get_many(storage_bucket, [f"{user_id}/{path}" for path in paths])
+        prefix = f"{user_id}/"
+        return jsonify({"urls": {path[len(prefix):]: url for path, url in urls.items()}}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
 @file_bp.route("/api/filesystem/file", methods=["POST"])
 @auth_required
 def upload_file():
@@ -64,14 +89,22 @@ def upload_file():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
+    summary_mode = request.form.get("summary_mode")
+    if summary_mode and summary_mode not in SUMMARIZATION_MODES:
+        return jsonify({"error": f"'summary_mode' must be one of {', '.join(SUMMARIZATION_MODES)}"}), 400
+
     try:
         filename = secure_filename(f"${str(uuid.uuid4().hex)}"+file.filename)
         file_path = f"{user_id}/{filename}"
         file_content = file.read()
         content_type = file.content_type or "application/octet-stream"
 
-        # Upload the file to Supabase storage
-        supabase.storage.from_("murf-documents").upload(
+        if not file_content:
+            return jsonify({"error": "Uploaded file could not be read"}), 404
+
+        # Store the original while the text is extracted and summarized (or found in the cache) from the bytes we already have
+        upload = _upload_executor.submit(
+            get_supabase().storage.from_("murf-documents").upload,
             path=file_path,
             file=file_content,
             file_options={
@@ -79,15 +112,20 @@ def upload_file():
                 "upsert": "true"
             }
         )
-
-        # Download the uploaded file
-        file_bytes = supabase.storage.from_("murf-documents").download(file_path)
-
-        if not file_bytes:
-            return jsonify({"error": "Uploaded file could not be read"}), 404
-
-        text = decode_file(file_bytes,filename)
-        results = summarize_text(text)
+        try:
+            results = summarize_document(file_content, filename, mode=summary_mode)
+        except Exception:
+            # Wait for the upload, but report the summarization error rather than an upload failure
+            try:
+                upload.result()
+            except Exception as upload_error:
+                print(f"Upload of {file_path} also failed: {upload_error}")
+            directory_cache.invalidate(user_id, "murf-documents")
+            raise
+        try:
+            upload.result()
+        finally:
+            directory_cache.invalidate(user_id, "murf-documents")
 
         return jsonify(
             results
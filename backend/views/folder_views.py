@@ -1,10 +1,23 @@
 from flask import request, jsonify,Blueprint
-from client.clients import supabase
+import base64
+import json
+from client.clients import get_supabase
 from client.client_auth import auth_required
+from utils.signed_urls import signed_url_cache
+from utils.storage_ops import delete_folder_tree,move_folder_tree,list_folder_entries
 from utils.helper import get_sort_date
+from utils.job_queue import job_status
+from utils.directory_cache import directory_cache
+from utils.env_variables_loader import LIST_PAGE_SIZE,LIST_PAGE_MAX
+from pipeline.storage_pipeline import submit_folder_delete,submit_folder_move,get_storage_job
 
 folder_bp = Blueprint("folder", __name__)
 
+def _user_folder(user_id, folder):
+    """The user's storage path for folder, or None for an empty or root path (the whole user tree)."""
+    folder = (folder or "").strip().strip("/")
+    return f"{user_id}/{folder}" if folder else None
+
 @folder_bp.route("/api/filesystem/folder", methods=["POST"])
 @auth_required
 def create_directory():
@@ -16,11 +29,12 @@ def create_directory():
         return jsonify({"error": "Missing directory name"}), 400
     placeholder_path = f"{user_id}/{directory}/.placeholder"
     try:
-        supabase.storage.from_(storage_bucket).upload(
+        get_supabase().storage.from_(storage_bucket).upload(
             path=placeholder_path,
             file=b"",
             file_options={"upsert": "true"}
         )
+        directory_cache.invalidate(user_id, storage_bucket)
         return jsonify({"message": "Directory created"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -29,31 +43,28 @@ def create_directory():
 @folder_bp.route("/api/filesystem/folder", methods=["DELETE"])
 @auth_required
 def delete_folder():
+    """Delete a folder and everything under it. With ?async=true, returns a job id to poll instead."""
     user_id = request.user['id']
     storage_bucket=request.args.get("storage_bucket")
     data = request.get_json()
-    folder_path = data.get("folder")  # e.g. "dummy_user/myfolder"
-    folder_path=f"{user_id}/{folder_path}"
+    folder_path = _user_folder(user_id, data.get("folder"))  # e.g. "myfolder"
     if not folder_path:
+        # An empty or "/" path would recursively delete everything the user has
         return jsonify({"error": "Missing folder path"}), 400
 
-    folder_path = folder_path.rstrip("/")  # sanitize
-
     try:
-        # Step 1: List all files in the folder
-        files = supabase.storage.from_(storage_bucket).list(path=folder_path)
-
-        file_paths = [
-            f"{folder_path}/{file['name']}" for file in files if file.get("metadata") is not None
-        ]
-
-        if not file_paths:
+        if request.args.get("async") == "true":
+            job_id = submit_folder_delete(user_id, storage_bucket, folder_path)
+            return jsonify({"status": "queued", "job_id": job_id, "path": folder_path}), 202
+
+        result = delete_folder_tree(storage_bucket, folder_path)
+        directory_cache.invalidate(user_id, storage_bucket)
+        signed_url_cache.invalidate_prefix(storage_bucket, folder_path)
+        if not result["deleted_files"] and not result["failed"]:
             return jsonify({"message": "No files found in folder", "path": folder_path}), 200
-
-        # Step 2: Delete all files
-        supabase.storage.from_(storage_bucket).remove(file_paths)
-
-        return jsonify({"message": "Folder deleted", "deleted_files": file_paths}), 200
+        if result["failed"]:
+            return jsonify({"message": "Folder partially deleted; retry to remove the rest", **result}), 207
+        return jsonify({"message": "Folder deleted", **result}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -62,49 +73,104 @@ def delete_folder():
 @folder_bp.route("/api/filesystem/folder", methods=["PUT"])
 @auth_required
 def update_folder():
+    """Rename or move a folder with all its subfolders. With ?async=true, returns a job id to poll instead."""
     user_id=request.user['id']
     storage_bucket=request.args.get("storage_bucket")
     data = request.get_json()
-    old_path = data.get("old_path")  # e.g. "dummy_user/old_folder"
-    new_path = data.get("new_path")  # e.g. "dummy_user/new_folder"
-    old_path=f"{user_id}/{old_path}"
-    new_path=f"{user_id}/{new_path}"
+    old_path = data.get("old_path")  # e.g. "old_folder"
+    new_path = data.get("new_path")  # e.g. "new_folder"
+    old_path = _user_folder(user_id, old_path)
+    new_path = _user_folder(user_id, new_path)
     if not old_path or not new_path:
         return jsonify({"error": "Missing old_path or new_path"}), 400
 
     try:
-        # List all files under the old folder path
-        files = supabase.storage.from_(storage_bucket).list(path=old_path)
+        if request.args.get("async") == "true":
+            job_id = submit_folder_move(user_id, storage_bucket, old_path, new_path)
+            return jsonify({"status": "queued", "job_id": job_id}), 202
+
+        result = move_folder_tree(storage_bucket, old_path, new_path)
+        directory_cache.invalidate(user_id, storage_bucket)
+        signed_url_cache.invalidate_prefix(storage_bucket, old_path)
+        signed_url_cache.invalidate_prefix(storage_bucket, new_path)
+        if result["failed"]:
+            return jsonify({"message": "Folder partially moved; retry to move the rest", **result}), 207
+        return jsonify({"message": "Folder updated", **result}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        moved_files = []
 
-        for file in files:
-            if file.get("metadata") is None:
-                continue  # skip subfolders
+@folder_bp.route("/api/filesystem/folder/jobs/<job_id>", methods=["GET"])
+@auth_required
+def get_folder_job(job_id):
+    """Progress of an async folder delete or move; the result lists moved/deleted and failed files."""
+    job = get_storage_job(job_id)
+    if not job or job["user_id"] != request.user['id']:
+        return jsonify({"error": "Folder job not found"}), 404
+    return jsonify(job_status(job)), 200
 
-            file_name = file["name"]
-            source = f"{old_path}/{file_name}"
-            target = f"{new_path}/{file_name}"
-            # Move the file by copying then deleting
-            supabase.storage.from_("murf-documents").copy(source, target)
-            supabase.storage.from_("murf-documents").remove([source])
-            moved_files.append({"from": source, "to": target})
+    
+LIST_SORT_COLUMNS = ("updated_at", "created_at", "name")
 
-        return jsonify({"message": "Folder updated", "files_moved": moved_files}), 200
+def _encode_cursor(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+def _decode_cursor(cursor):
+    offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"]
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("bad offset")
+    return offset
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    
 @folder_bp.route("/api/filesystem/list-directory", methods=["GET"])
 @auth_required
 def list_directory():
+    """List a directory.
+
+    Without ?limit or ?cursor the whole directory is returned, newest first with folders last, and
+    next_cursor is null. With either, one page is returned in storage order
+    (?sort=updated_at|created_at|name&order=desc|asc); folders have no timestamps, so storage puts
+    them first when sorting by a date descending. Pass the returned next_cursor as ?cursor= to get
+    the following page; it is null on the last page.
+    """
     user_id = request.user['id']
     storage_bucket=request.args.get("storage_bucket")
     directory = request.args.get("directory", "")
     folder_path = f"{user_id}/{directory}".rstrip("/")
+    # sign=lazy leaves out URLs; the client signs a file when it is opened via /api/filesystem/file/signed-url
+    lazy_sign = request.args.get("sign") == "lazy"
+    sort = request.args.get("sort", "updated_at")
+    order = request.args.get("order", "desc")
+    if sort not in LIST_SORT_COLUMNS or order not in ("asc", "desc"):
+        return jsonify({"error": f"'sort' must be one of {', '.join(LIST_SORT_COLUMNS)} and 'order' asc or desc"}), 400
+    paginated = "limit" in request.args or "cursor" in request.args
+    try:
+        limit = min(int(request.args.get("limit", LIST_PAGE_SIZE)), LIST_PAGE_MAX)
+        offset = _decode_cursor(request.args["cursor"]) if request.args.get("cursor") else 0
+    except (ValueError, KeyError, TypeError):
+        return jsonify({"error": "Invalid 'limit' or 'cursor'"}), 400
+    if limit < 1:
+        return jsonify({"error": "'limit' must be positive"}), 400
+
     try:
-        files = supabase.storage.from_(storage_bucket).list(path=folder_path)
-        print(files)
+        generation = directory_cache.generation(user_id, storage_bucket)
+        page_key = (folder_path, sort, order, offset, limit) if paginated else (folder_path, "all")
+        files = directory_cache.get(user_id, storage_bucket, generation, page_key)
+        if files is None:
+            if paginated:
+                files = get_supabase().storage.from_(storage_bucket).list(path=folder_path, options={
+                    "limit": limit,
+                    "offset": offset,
+                    "sortBy": {"column": sort, "order": order},
+                })
+            else:
+                files = list_folder_entries(storage_bucket, folder_path)
+            directory_cache.set(user_id, storage_bucket, generation, page_key, files)
+
+        file_paths = [f"{folder_path}/{file['name']}".lstrip("/") for file in files if file['metadata'] is not None]
+        urls = {} if lazy_sign else signed_url_cache.get_many(storage_bucket, file_paths)
         result = []
         for file in files:
             item_name = file['name']
@@ -117,11 +183,6 @@ def list_directory():
                     "type": "directory"
                 })
             else:
-                # It's a file, generate signed URL
-                signed_url_response = supabase.storage.from_(storage_bucket).create_signed_url(
-                    path=full_path,
-                    expires_in=3600  # 1 hour expiry
-                )
                 result.append({
                     "name": item_name,
                     "type": "file",
@@ -129,10 +190,12 @@ def list_directory():
                     "created_at": file.get('created_at'),
                     "updated_at": file.get('updated_at'),
                     "last_modified": file['metadata'].get('lastModified') if file['metadata'] else None,
-                    "url": signed_url_response['signedURL']
+                    "url": urls.get(full_path)
                 })
-        result.sort(key=get_sort_date, reverse=True)
-        return jsonify({"items": result}), 200
+        if not paginated:
+            result.sort(key=get_sort_date, reverse=True)
+        next_cursor = _encode_cursor(offset + limit) if paginated and len(files) == limit else None
+        return jsonify({"items": result, "next_cursor": next_cursor}), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
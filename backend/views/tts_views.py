@@ -1,10 +1,15 @@
+import json
+import re
 from flask import request, jsonify, Response
-from pipeline.recommendation_pipeline import *
+from pipeline.recommendation_pipeline import (
+    fallback_config, fetch_murf_voices, get_incremental_tts_configs,
+    get_story_tts_configs_with_voice_assignment, get_voice_catalog, stream_story_tts_configs,
+)
 from flask import request, jsonify,Blueprint,send_file
-import os
-import uuid
-from client.clients import supabase  # Assuming already configured
-from utils.helper import download_murf_clip,combine_mp3_files_binary
+from utils.preview_stream import open_preview,preview_cache,preview_mimetype,sniff_mimetype
+from utils.env_variables_loader import PREVIEW_CACHE_MAX_AGE,VOICE_PAGE_MAX
+from pipeline.export_pipeline import submit_export_job,get_export_job
+from utils.job_queue import job_status
 from client.client_auth import auth_required
 
 tts_bp = Blueprint("tts", __name__)
@@ -22,7 +27,7 @@ def recommend_tts_options():
         return jsonify({"error": "Text too short for meaningful analysis"}), 400
     
     try:
-        recommendations = get_story_tts_configs_with_voice_assignment(text)
+        recommendations = get_story_tts_configs_with_voice_assignment(text, chunked=data.get("chunked"))
         return jsonify(recommendations), 200
     except Exception as e:
         return jsonify({
@@ -31,33 +36,121 @@ def recommend_tts_options():
         }), 500
 
 
+@tts_bp.route("/api/tts/recommend-options/stream", methods=["POST"])
+def recommend_tts_options_stream():
+    """Stream sentence configs as they are produced: NDJSON by default, Server-Sent Events with ?format=sse"""
+    data = request.get_json()
+    text = data.get("text")
+
+    if not text:
+        return jsonify({"error": "Missing 'text' in request body"}), 400
+
+    if len(text.strip()) < 3:
+        return jsonify({"error": "Text too short for meaningful analysis"}), 400
+
+    sse = request.args.get("format") == "sse"
+    chunked = data.get("chunked")
+
+    def encode(event):
+        line = json.dumps(event)
+        return f"data: {line}\n\n" if sse else line + "\n"
+
+    def generate():
+        count = 0
+        try:
+            for kind, key, value in stream_story_tts_configs(text, chunked=chunked):
+                if kind == "item":
+                    yield encode({"type": "sentence_config", "index": count, "value": value})
+                    count += 1
+                else:
+                    yield encode({"type": key, "value": value})
+            yield encode({"type": "done", "count": count})
+        except Exception as e:
+            yield encode({"type": "error", "message": f"Recommendation failed: {str(e)}"})
+
+    mimetype = "text/event-stream" if sse else "application/x-ndjson"
+    return Response(generate(), mimetype=mimetype, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@tts_bp.route("/api/tts/recommend-options/incremental", methods=["POST"])
+def recommend_tts_options_incremental():
+    """Re-recommend only edited sentences, keeping the previous voice assignments"""
+    data = request.get_json()
+    character_voice_map = data.get("character_voice_map")
+    previous_configs = data.get("sentence_configs")
+    sentences = data.get("sentences")
+
+    if not isinstance(character_voice_map, dict) or not character_voice_map:
+        return jsonify({"error": "Missing 'character_voice_map' in request body"}), 400
+    if not isinstance(previous_configs, list) or not all(isinstance(c, dict) for c in previous_configs):
+        return jsonify({"error": "'sentence_configs' must be a list of config objects"}), 400
+    if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+        return jsonify({"error": "'sentences' must be a list of strings"}), 400
+    if not all(isinstance(c.get("text", ""), str) for c in previous_configs):
+        return jsonify({"error": "Each of 'sentence_configs' needs a string 'text'"}), 400
+    try:
+        context_window = int(data.get("context_window", 2))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'context_window' must be an integer"}), 400
+    if context_window < 0:
+        return jsonify({"error": "'context_window' must not be negative"}), 400
+
+    try:
+        result = get_incremental_tts_configs(previous_configs, character_voice_map, sentences, context_window)
+        analyzed_spans = sum(1 for op in result["patch"] if op["sentence_configs"])
+        if analyzed_spans and len(result["failed_spans"]) == analyzed_spans:
+            # Nothing could be analyzed: the editor should keep its current configs
+            return jsonify({"error": "Incremental recommendation failed", "failed_spans": result["failed_spans"]}), 502
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"error": f"Incremental recommendation failed: {str(e)}"}), 500
+
+
 @tts_bp.route("/api/tts/voice", methods=["GET"])
 @auth_required
 def get_voice():
-    """Get all available voices with their capabilities"""
-    voices = fetch_murf_voices()
-    selected_voiceId=request.args.get("voiceId")
-    for voice in voices:
-        if voice["voice_id"]==selected_voiceId:
-            return jsonify({"voice_details": voice}), 200
+    """Get one voice by voiceId"""
+    voice = get_voice_catalog().get(request.args.get("voiceId"))
+    if voice:
+        return jsonify({"voice_details": voice}), 200
     return jsonify({"voice_details": {}}), 404
 
 
 @tts_bp.route("/api/tts/voices", methods=["GET"])
 @auth_required
 def get_voices():
-    """Get all available voices with their capabilities"""
-    voices = fetch_murf_voices()
-    if voices:
-        return jsonify({"voices": voices}), 200
-    return jsonify({"voices": []}), 404
+    """Get available voices, optionally filtered by gender, locale, accent and style and paginated."""
+    catalog = get_voice_catalog()
+    if not len(catalog):
+        return jsonify({"voices": []}), 404
+
+    try:
+        page = int(request.args.get("page", 1))
+        page_size = int(request.args["page_size"]) if "page_size" in request.args else None
+    except ValueError:
+        return jsonify({"error": "'page' and 'page_size' must be integers"}), 400
+    if page < 1 or (page_size is not None and page_size < 1):
+        return jsonify({"error": "'page' and 'page_size' must be positive"}), 400
+    if page_size is not None:
+        page_size = min(page_size, VOICE_PAGE_MAX)
+
+    voices, total = catalog.query(
+        gender=request.args.get("gender"),
+        locale=request.args.get("locale"),
+        accent=request.args.get("accent"),
+        style=request.args.get("style"),
+        page=page,
+        page_size=page_size,
+    )
+    return jsonify({
+        "voices": voices,
+        "total": total,
+        "page": page if page_size else 1,
+        "page_size": page_size or total,
+        "catalog_version": catalog.version
+    }), 200
+
 
-     
-res = murf_client.text_to_speech.stream(
-    text="Hi, how are you doing today?", 
-    voice_id="en-US-natalie",
-    format="MP3"
-)
 @tts_bp.route("/api/tts/playvoice", methods=["POST"])
 @auth_required
 def play_voice():
@@ -70,55 +163,65 @@ def play_voice():
 @tts_bp.route("/api/tts/export-audio", methods=["POST"])
 @auth_required
 def generate_combined_audio():
-    temp_files = []
+    """Queue an export job; poll /api/tts/export-audio/<job_id> for progress and the result."""
     user_id = request.user['id']
     combined_filename = request.json.get("file_name")
     configs=request.json.get("configs")
 
-    try:
-        # Step 1: Generate & download all MP3 clips
-        for cfg in configs:
-            filename = f"temp_{uuid.uuid4().hex[:8]}.mp3"
-            download_murf_clip(cfg, filename)
-            temp_files.append(filename)
-
-        # Step 2: Combine all MP3s into one
-        combine_mp3_files_binary(temp_files, combined_filename)
-
-        # Step 3: Upload to Supabase
-        bucket_name = "murf-audiofiles"
-        path_in_storage = f"{user_id}/{combined_filename}"
-
-        with open(combined_filename, "rb") as file:
-            result = supabase.storage.from_(bucket_name).upload(path_in_storage, file,file_options={
-                "upsert":"true"
-            })
+    if not combined_filename or not configs:
+        return jsonify({"status": "error", "message": "Missing 'file_name' or 'configs'"}), 400
 
+    try:
+        job_id = submit_export_job(user_id, combined_filename, configs)
         return jsonify({
-            "status": "success",
-            "message": "Audio generated and uploaded successfully.",
-            "supabase_path": path_in_storage,
+            "status": "queued",
+            "message": "Audio export started.",
+            "job_id": job_id,
             "file_name": combined_filename
-        })
+        }), 202
 
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
-    finally:
-        for f in temp_files:
-            if os.path.exists(f):
-                os.remove(f)
-        if os.path.exists(combined_filename):
-            os.remove(combined_filename)
-        print("Temporary files cleaned up.")
+@tts_bp.route("/api/tts/export-audio/<job_id>", methods=["GET"])
+@auth_required
+def get_export_status(job_id):
+    """Report per-clip progress, ETA and, once finished, the uploaded file's supabase_path."""
+    job = get_export_job(job_id)
+    if not job or job["user_id"] != request.user['id']:
+        return jsonify({"status": "error", "message": "Export job not found"}), 404
+
+    status = job_status(job)
+    result = status.pop("result") or {}
+    status.update(result)
+    return jsonify(status), 200
 
 @tts_bp.route("/api/audiosystem/play",methods=["POST"])
 @auth_required
 def stream_audio():
+    """Preview a config. Replays come from the local cache; concurrent first plays share one synthesis.
+
+    X-Preview-Key names the clip for ranged replays via GET /api/audiosystem/play/<key>.
+    """
     data = request.get_json()
-    def generate():
-        for chunk in murf_client.text_to_speech.stream(
-          **data.get("config")
-        ):
-            yield chunk
-    return Response(generate(), mimetype="audio/mpeg")
\ No newline at end of file
+    config = data.get("config")
+    if not config:
+        return jsonify({"error": "Missing 'config' in request body"}), 400
+
+    mimetype = preview_mimetype(config)
+    key, path, chunks = open_preview(config)
+    if path:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=key, max_age=PREVIEW_CACHE_MAX_AGE)
+    else:
+        response = Response(chunks, mimetype=mimetype)
+    response.headers["X-Preview-Key"] = key
+    return response
+
+@tts_bp.route("/api/audiosystem/play/<key>",methods=["GET"])
+@auth_required
+def replay_audio(key):
+    """Serve a cached preview with Range and If-None-Match support."""
+    path = preview_cache.get_path(key) if re.fullmatch(r"[0-9a-f]{64}", key) else None
+    if not path:
+        return jsonify({"error": "Preview not found; play it first"}), 404
+    return send_file(path, mimetype=sniff_mimetype(path), conditional=True, etag=key, max_age=PREVIEW_CACHE_MAX_AGE)
@@ -83,6 +83,10 @@ export default function TTSEditor({
   const [playingIndex, setPlayingIndex] = useState<number | null>(null);
   const [expandedIndex, setExpandedIndex] = useState<number | null>(null);
   const [isLoadingExport, setIsLoadingExport] = useState(false);
+  const [exportProgress, setExportProgress] = useState<{
+    completed: number;
+    total: number;
+  } | null>(null);
   const [loadingIndex, setLoadingIndex] = useState<number | null>(null);
   // Add these state variables at the top of your component
   const [showExportModal, setShowExportModal] = useState(false);
@@ -188,18 +192,44 @@ export default function TTSEditor({
         }
       );
 
-      const result = await response.json();
+      const job = await response.json();
 
-      if (response.ok) {
+      if (!response.ok) {
+        alert(`Error exporting audio: ${job.message || "Unknown error"}`);
+        return;
+      }
+
+      // The export runs as a background job; poll until it finishes
+      let result = job;
+      while (result.status === "queued" || result.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const token = await getToken();
+        const statusResponse = await fetch(
+          `https://sonus.onrender.com/api/tts/export-audio/${job.job_id}`,
+          {
+            headers: {
+              Authorization: `Bearer ${token}`,
+            },
+          }
+        );
+        result = await statusResponse.json();
+        if (!statusResponse.ok) break;
+        setExportProgress({ completed: result.completed, total: result.total });
+      }
+
+      if (result.status === "completed") {
         alert(`Audio file ${result["file_name"]} exported successfully!`);
       } else {
-        alert(`Error exporting audio: ${result.message || "Unknown error"}`);
+        alert(
+          `Error exporting audio: ${result.error || result.message || "Unknown error"}`
+        );
       }
     } catch (error) {
       console.error("Error exporting audio:", error);
       alert("Error exporting audio. Please try again.");
     } finally {
       setIsLoadingExport(false);
+      setExportProgress(null);
       setExportFileName("");
       setFileExists(false);
     }
@@ -479,6 +509,12 @@ export default function TTSEditor({
                 />
               </svg>
               <h2 className="text-2xl font-bold mt-2">Exporting Audio...</h2>
+              {exportProgress && exportProgress.total > 0 && (
+                <p className="mt-1 text-sm text-[hsl(var(--muted-foreground))]">
+                  {exportProgress.completed} of {exportProgress.total} blocks
+                  synthesized
+                </p>
+              )}
             </div>
           </div>
         )}